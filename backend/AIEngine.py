@@ -1,30 +1,15 @@
 import chess
 import chess.engine
-import sys
-import json
-import random
-BOOK_PATH = "ecoA.json"
-with open(BOOK_PATH, 'r') as f:
-    OPENING_BOOK = json.load(f) # Load the opening book
+import evaluation
+from engine_pool import EnginePool
+from opening_book import OpeningBook
+OPENING_BOOK = OpeningBook() # Compiled from eco*.json by opening_book.py
 
 def get_opening_move(board: chess.Board):
-    fen = board.fen()
-    if fen in OPENING_BOOK:
-        moves_list = OPENING_BOOK[fen]['moves'].split()  # Split moves from PGN string
-        # Convert algebraic to UCI
-        move_uci = random.choice([m for i, m in enumerate(moves_list) if i % 2 == 1])
-        return board.parse_uci(move_uci)
-    return None
+    return OPENING_BOOK.get_move(board)
 
-def get_best_move(board: chess.Board) -> chess.Move:
-    if sys.platform == "win":
-        engine_path = "engine/stockfish-windows-x86-64-avx2.exe"
-    else:
-        engine_path = "engine/stockfish-macos-m1-apple-silicon"
-    engine = chess.engine.SimpleEngine.popen_uci(engine_path)
-    result = engine.play(board, chess.engine.Limit(time=0.1))
-    engine.quit()
-    return result.move
+def get_best_move(board: chess.Board, pool: EnginePool, time_limit: float = 0.1) -> chess.Move:
+    return pool.play(board, chess.engine.Limit(time=time_limit))
 
 
 def minimax(board: chess.Board, depth: int, alpha=float('-inf'), beta=float('inf')) -> float:
@@ -57,17 +42,5 @@ def minimax(board: chess.Board, depth: int, alpha=float('-inf'), beta=float('inf
 
 
 def evaluate_board(board: chess.Board) -> float:
-    piece_values = {
-        chess.PAWN: 1,
-        chess.KNIGHT: 3,
-        chess.BISHOP: 3,
-        chess.ROOK: 5,
-        chess.QUEEN: 9,
-        chess.KING: 0
-    }
-
-    value = 0
-    for piece_type, val in piece_values.items():
-        value += len(board.pieces(piece_type, chess.WHITE)) * val
-        value -= len(board.pieces(piece_type, chess.BLACK)) * val
-    return value
+    # Material plus piece-square tables, in pawns from White's point of view.
+    return evaluation.evaluate(board) / 100
@@ -1,75 +1,284 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import asyncio
+import itertools
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import List, Optional, Tuple
 import chess
 import chess.engine
-from AIEngine import get_best_move, minimax, evaluate_board, get_opening_move
+import workers
+from AIEngine import get_best_move, get_opening_move
+from cache import ResultCache, source_version
+from evaluation import evaluate_batch
+from engine_pool import EnginePool, EnginePoolBusy
+from multiplayer import RoomHub
+from opening_book import ensure_book
+from parallel_search import ParallelSearch, ParallelSearchBusy
+from search import Searcher
 
-app = FastAPI()
+MINIMAX_DEPTH = int(os.environ.get("MINIMAX_DEPTH", "4"))
+MINIMAX_TIME_LIMIT = float(os.environ.get("MINIMAX_TIME_LIMIT", "2.0"))
+MAX_BATCH_POSITIONS = int(os.environ.get("MAX_BATCH_POSITIONS", "500"))
+# Positions a batch may have queued or running in the shared pool at once.
+# The rest wait here, so interactive requests never queue behind a whole batch.
+MAX_BATCH_IN_FLIGHT = int(os.environ.get("MAX_BATCH_IN_FLIGHT", "2"))
+MAX_SEARCH_DEPTH = int(os.environ.get("MAX_SEARCH_DEPTH", "8"))
+MAX_SEARCH_TIME_LIMIT = float(os.environ.get("MAX_SEARCH_TIME_LIMIT", "10.0"))
+MAX_SEARCH_NODES = int(os.environ.get("MAX_SEARCH_NODES", "2000000"))
+# Parallel searches have no time limit and occupy every worker, so they get
+# a lower depth cap of their own.
+MAX_PARALLEL_DEPTH = int(os.environ.get("MAX_PARALLEL_DEPTH", "5"))
+ENGINE_TIME_LIMIT = 0.1
+MINIMAX_PARALLEL = os.environ.get("MINIMAX_PARALLEL", "0") == "1"
+
+logger = logging.getLogger(__name__)
+engine_pool = EnginePool.from_env()
+search_pool: Optional[ProcessPoolExecutor] = None
+parallel_search: Optional[ParallelSearch] = None
+result_cache = ResultCache.from_env(version=source_version(evaluate_batch, Searcher, ParallelSearch))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global search_pool, parallel_search
+    # Build the opening book here, before any worker exists, so workers
+    # only ever open a finished file.
+    try:
+        if ensure_book():
+            logger.info("rebuilt the opening book from changed sources")
+    except OSError as exc:
+        # A read-only deployment can still use the shipped book.
+        logger.warning("could not rebuild the opening book: %s", exc)
+    # Single requests, batch analysis and parallel root searches share one
+    # pool of worker processes.
+    parallel_search = ParallelSearch.create()
+    search_pool = parallel_search.executor
+    try:
+        engine_pool.start()
+    except (OSError, chess.engine.EngineError) as exc:
+        # Minimax mode still works without Stockfish; engine mode answers 503.
+        logger.warning("could not start engine pool from %s: %s", engine_pool.engine_path, exc)
+    yield
+    engine_pool.close()
+    parallel_search.shutdown()
+    result_cache.close()
+
+app = FastAPI(lifespan=lifespan)
+
+def search_limits(depth: Optional[int], time_limit: Optional[float],
+                  node_limit: Optional[int] = None) -> Tuple[int, float, Optional[int]]:
+    # Clients may ask for less than the server maximums but never more, so
+    # no single request can hold the shared worker pool indefinitely.
+    depth = MINIMAX_DEPTH if depth is None else depth
+    time_limit = MINIMAX_TIME_LIMIT if time_limit is None else time_limit
+    if depth <= 0:
+        raise HTTPException(status_code=400, detail="depth must be at least 1.")
+    if time_limit <= 0:
+        raise HTTPException(status_code=400, detail="time_limit must be positive.")
+    if node_limit is not None:
+        if node_limit <= 0:
+            raise HTTPException(status_code=400, detail="node_limit must be at least 1.")
+        node_limit = min(node_limit, MAX_SEARCH_NODES)
+    return min(depth, MAX_SEARCH_DEPTH), min(time_limit, MAX_SEARCH_TIME_LIMIT), node_limit
+
+async def cache_get(board: chess.Board, mode: str, depth: Optional[int] = None,
+                    time_limit: Optional[float] = None) -> Optional[dict]:
+    # With SQLite behind the cache a lookup or store touches the disk, so it
+    # runs in the threadpool rather than on the event loop.
+    if result_cache.persistent:
+        return await run_in_threadpool(result_cache.get, board, mode, depth, time_limit)
+    return result_cache.get(board, mode, depth, time_limit)
+
+async def cache_put(board: chess.Board, mode: str, value: dict, depth: int = 0,
+                    time_limit: Optional[float] = None) -> None:
+    if result_cache.persistent:
+        await run_in_threadpool(result_cache.put, board, mode, value, depth, time_limit)
+    else:
+        result_cache.put(board, mode, value, depth, time_limit)
 
 class BoardState(BaseModel):
     fen: str
     game_mode: str = "engine"  # "engine" or "minimax"
+    depth: Optional[int] = None
+    time_limit: Optional[float] = None
+    node_limit: Optional[int] = None
+    parallel: Optional[bool] = None
+
+class BoardBatch(BaseModel):
+    fens: List[str]
+
+class AnalysisPosition(BaseModel):
+    fen: str
+    depth: Optional[int] = None
+    time_limit: Optional[float] = None
+    node_limit: Optional[int] = None
+
+class BatchAnalysis(BaseModel):
+    positions: List[AnalysisPosition] = []
+    fens: List[str] = []
+    pgn: Optional[str] = None
+    depth: Optional[int] = None
+    time_limit: Optional[float] = None
+    node_limit: Optional[int] = None
 
 @app.post("/evalbar/")
 def eval_bar(board_state: BoardState):
     board = chess.Board(board_state.fen)
-    eval = evaluate_board(board)
-    return {"evaluation": eval}
+    cached = result_cache.get(board, "eval")
+    if cached is not None:
+        return cached
+    eval = evaluate_batch([board])[0] / 100
+    result = {"evaluation": float(eval)}
+    result_cache.put(board, "eval", result)
+    return result
+
+@app.post("/evalbar/batch/")
+def eval_bar_batch(batch: BoardBatch):
+    boards = [chess.Board(fen) for fen in batch.fens]
+    evals = evaluate_batch(boards) / 100 if boards else []
+    return {"evaluations": [float(eval) for eval in evals]}
 
 @app.post("/best-move/")
-def best_move(board_state: BoardState):
+async def best_move(board_state: BoardState):
     board = chess.Board(board_state.fen)
     if board_state.game_mode == "minimax":
-        move = get_opening_move(board)
-        if move:
-            return {"best_move": move.uci()}
-        best_move_result = None
-        best_value = float('-inf') if board.turn == chess.WHITE else float('inf')
-        for move in board.legal_moves:
-            board.push(move)
-            board_value = minimax(board, 3)
-            board.pop()
-            if (board.turn == chess.WHITE and board_value > best_value) or \
-               (board.turn == chess.BLACK and board_value < best_value):
-                best_value = board_value
-                best_move_result = move
-        return {"best_move": best_move_result.uci() if best_move_result else None}
+        depth, time_limit, node_limit = search_limits(board_state.depth, board_state.time_limit,
+                                                      board_state.node_limit)
+        parallel = MINIMAX_PARALLEL if board_state.parallel is None else board_state.parallel
+        if parallel:
+            # Fixed-depth search split across all worker processes; time and
+            # node limits do not apply so the result is reproducible. Cached
+            # per depth, since a deeper result would answer differently.
+            depth = min(depth, MAX_PARALLEL_DEPTH)
+            mode = f"minimax-parallel:{depth}"
+            cached = await cache_get(board, mode)
+            if cached is not None:
+                return cached
+            move = get_opening_move(board)
+            if move:
+                return {"best_move": move.uci()}
+            try:
+                result = (await run_in_threadpool(parallel_search.search, board, depth)).to_dict()
+            except ParallelSearchBusy as exc:
+                raise HTTPException(status_code=503, detail=str(exc))
+            await cache_put(board, mode, result, result["depth"])
+            return result
+        cached = await cache_get(board, "minimax", depth, time_limit)
+        if cached is not None:
+            return cached
+        # The search is CPU-bound Python, so it runs in a worker process to
+        # keep the event loop free for other requests and websockets.
+        result = await asyncio.get_running_loop().run_in_executor(
+            search_pool, workers.best_move, board.fen(), depth, time_limit, node_limit,
+        )
+        # Book moves are picked at random and a search stopped before depth 1
+        # only has a placeholder move, so neither is cached.
+        if result.get("depth"):
+            # Only a search that ran out of time stands in for other requests
+            # with the same time budget; otherwise its depth is what counts.
+            timed_out = result["depth"] < depth and node_limit is None
+            await cache_put(board, "minimax", result, result["depth"], time_limit if timed_out else None)
+        return result
     elif board_state.game_mode == "engine":
-        move = get_best_move(board)
-        return {"best_move": move.uci()}
+        cached = await cache_get(board, "engine", time_limit=ENGINE_TIME_LIMIT)
+        if cached is not None:
+            return cached
+        try:
+            move = await run_in_threadpool(get_best_move, board, engine_pool, ENGINE_TIME_LIMIT)
+        except (EnginePoolBusy, chess.engine.EngineError) as exc:
+            raise HTTPException(status_code=503, detail=str(exc))
+        result = {"best_move": move.uci() if move else None}
+        if move:
+            await cache_put(board, "engine", result, time_limit=ENGINE_TIME_LIMIT)
+        return result
     else:
         return {"error": "Invalid game mode. Choose 'engine' or 'minimax'."}
+
+@app.post("/analyze/batch")
+async def analyze_batch(batch: BatchAnalysis):
+    positions = list(batch.positions)
+    positions.extend(AnalysisPosition(fen=fen) for fen in batch.fens)
+    if batch.pgn:
+        try:
+            positions.extend(AnalysisPosition(fen=fen) for fen in workers.pgn_positions(batch.pgn))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid PGN: {exc}")
+    if not positions:
+        raise HTTPException(status_code=400, detail="No positions to analyze.")
+    if len(positions) > MAX_BATCH_POSITIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_POSITIONS} positions per batch.")
+
+    limits = [
+        search_limits(batch.depth if position.depth is None else position.depth,
+                      batch.time_limit if position.time_limit is None else position.time_limit,
+                      batch.node_limit if position.node_limit is None else position.node_limit)
+        for position in positions
+    ]
+    jobs = iter([(index, position.fen, *limit) for index, (position, limit) in enumerate(zip(positions, limits))])
+
+    async def results():
+        loop = asyncio.get_running_loop()
+        running = set()
+        try:
+            while True:
+                # Top up the window as results stream out.
+                for job in itertools.islice(jobs, MAX_BATCH_IN_FLIGHT - len(running)):
+                    running.add(loop.run_in_executor(search_pool, workers.analyse_position, *job))
+                if not running:
+                    break
+                done, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    yield json.dumps(future.result()) + "\n"
+        finally:
+            # Drop queued work if the client goes away mid-stream.
+            for future in running:
+                future.cancel()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @app.get("/")
 def root():
     return {"message": "Chess Engine API is running!"}
-# --- new section for multiplayer WebSocket ---
-from typing import List
-
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+@app.get("/health/engines")
+def engine_health():
+    return engine_pool.stats()
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+@app.get("/cache/stats")
+def cache_stats():
+    return result_cache.stats()
+# --- new section for multiplayer WebSocket ---
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            await connection.send_json(message)
+hub = RoomHub()
 
-manager = ConnectionManager()
+@app.get("/health/rooms")
+def room_health():
+    return hub.stats()
 
 @app.websocket("/ws/chess")
-async def websocket_endpoint(websocket: WebSocket):
-    await manager.connect(websocket)
+@app.websocket("/ws/chess/{room_id}")
+async def websocket_endpoint(websocket: WebSocket, room_id: str = "lobby"):
+    connection = await hub.connect(websocket, room_id)
     try:
-        while True:
-            data = await websocket.receive_json()
-            print("Received:", data)
-            # Expecting data like {"from": "e2", "to": "e4"}
-            await manager.broadcast(data)  # send move to all players
-    except WebSocketDisconnect:
-        manager.disconnect(websocket)
\ No newline at end of file
+        while not connection.closed:
+            text = await websocket.receive_text()
+            try:
+                data = json.loads(text)
+            except ValueError:
+                connection.send_json({"type": "error", "error": "invalid JSON"})
+                continue
+            # Expecting data like {"from": "e2", "to": "e4", "promotion": "q"},
+            # or {"type": "reset"} / {"type": "undo"} from a seated player.
+            if not isinstance(data, dict):
+                connection.send_json({"type": "error", "error": "expected a JSON object"})
+                continue
+            connection.room.handle(connection, data)
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        hub.disconnect(connection)
@@ -0,0 +1,311 @@
+import argparse
+import asyncio
+import cProfile
+import pstats
+import statistics
+import time
+from typing import Dict, List
+
+import chess
+
+import AIEngine
+import evaluation
+import profiling
+from search import Searcher
+
+BENCH_SUITE: Dict[str, List[str]] = {
+    "opening": [
+        chess.STARTING_FEN,
+        "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3",
+        "rnbqkb1r/pp2pppp/3p1n2/8/3NP3/8/PPP2PPP/RNBQKB1R w KQkq - 1 5",
+    ],
+    "middlegame": [
+        "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+        "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+        "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 1 8",
+    ],
+    "tactical": [
+        "r1bqkb1r/pppp1ppp/2n2n2/4p2Q/2B1P3/8/PPPP1PPP/RNB1K1NR w KQkq - 4 4",
+        "6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1",
+        "r2qkb1r/pp2nppp/3p4/2pNN1B1/2BnP3/3P4/PPP2PPP/R2bK2R w KQkq - 1 1",
+    ],
+    "endgame": [
+        "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+        "2r3k1/pp3ppp/2n5/3p4/3P4/2N5/PP3PPP/2R3K1 w - - 0 1",
+        "8/8/4k3/8/2K5/3P4/8/8 w - - 0 1",
+    ],
+}
+BENCH_FENS = [fen for fens in BENCH_SUITE.values() for fen in fens]
+
+
+def _suite(categories: List[str]) -> Dict[str, List[str]]:
+    return {name: BENCH_SUITE[name] for name in categories or BENCH_SUITE}
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def legacy_best_move(board: chess.Board, depth: int):
+    # The root loop /best-move/ used before the search rewrite, with a
+    # counting wrapper around the recursive minimax so nodes can be compared.
+    original = AIEngine.minimax
+    nodes = 0
+
+    def counting_minimax(*args, **kwargs):
+        nonlocal nodes
+        nodes += 1
+        return original(*args, **kwargs)
+
+    AIEngine.minimax = counting_minimax
+    try:
+        best_move = None
+        best_value = float('-inf') if board.turn == chess.WHITE else float('inf')
+        for move in board.legal_moves:
+            board.push(move)
+            value = AIEngine.minimax(board, depth - 1)
+            board.pop()
+            if (board.turn == chess.WHITE and value > best_value) or \
+               (board.turn == chess.BLACK and value < best_value):
+                best_value = value
+                best_move = move
+    finally:
+        AIEngine.minimax = original
+    return best_move, nodes
+
+
+def compare_search(fens, depth: int) -> None:
+    print(f"{'position':<10}{'legacy move':>12}{'nodes':>10}{'time':>8}"
+          f"{'new move':>10}{'nodes':>10}{'time':>8}{'depth@time':>12}")
+    totals = [0, 0.0, 0, 0.0]
+    for index, fen in enumerate(fens):
+        board = chess.Board(fen)
+
+        started = time.perf_counter()
+        legacy_move, legacy_nodes = legacy_best_move(board, depth)
+        legacy_time = time.perf_counter() - started
+
+        fixed = Searcher().search(board, max_depth=depth)
+        # Same wall-clock budget the legacy search needed, to see how deep
+        # the new search gets in that time.
+        timed = Searcher().search(board, time_limit=legacy_time)
+
+        totals[0] += legacy_nodes
+        totals[1] += legacy_time
+        totals[2] += fixed.nodes
+        totals[3] += fixed.elapsed
+        print(f"{index:<10}{legacy_move.uci() if legacy_move else '-':>12}{legacy_nodes:>10}{legacy_time:>8.2f}"
+              f"{fixed.best_move.uci() if fixed.best_move else '-':>10}{fixed.nodes:>10}{fixed.elapsed:>8.2f}"
+              f"{timed.depth:>12}")
+    print(f"{'total':<10}{'':>12}{totals[0]:>10}{totals[1]:>8.2f}{'':>10}{totals[2]:>10}{totals[3]:>8.2f}")
+
+
+def bench_search(suite: Dict[str, List[str]], depth: int, legacy_depth: int) -> None:
+    # Time-to-depth comes from fresh searches capped at each depth, so every
+    # figure includes the shallower iterations the way a real request does.
+    print(f"{'category':<12}{'pos':>4}{'nodes/s':>10}" + "".join(f"{'d' + str(d):>8}" for d in range(1, depth + 1))
+          + f"{'move':>8}{'legacy':>8}")
+    agree = total = 0
+    for category, fens in suite.items():
+        for index, fen in enumerate(fens):
+            board = chess.Board(fen)
+            times = []
+            result = None
+            for limit in range(1, depth + 1):
+                result = Searcher().search(board, max_depth=limit)
+                times.append(result.elapsed)
+            legacy_move = None
+            if legacy_depth:
+                legacy_move, _ = legacy_best_move(board, legacy_depth)
+                same_depth = Searcher().search(board, max_depth=legacy_depth)
+                total += 1
+                agree += same_depth.best_move == legacy_move
+            nps = result.nodes / result.elapsed if result.elapsed else 0.0
+            print(f"{category:<12}{index:>4}{nps:>10.0f}" + "".join(f"{t:>8.3f}" for t in times)
+                  + f"{result.best_move.uci() if result.best_move else '-':>8}"
+                  + f"{legacy_move.uci() if legacy_move else '-':>8}")
+    if total:
+        print(f"best-move agreement with legacy minimax at depth {legacy_depth}: {agree}/{total}")
+
+
+def bench_eval(suite: Dict[str, List[str]], repeat: int) -> None:
+    boards = [chess.Board(fen) for fens in suite.values() for fen in fens] * repeat
+
+    def rate(label: str, count: int, func) -> None:
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        print(f"{label:<28}{count / elapsed:>14.0f} evals/s")
+
+    rate("evaluate_board", len(boards), lambda: [AIEngine.evaluate_board(board) for board in boards])
+    rate("evaluation.evaluate", len(boards), lambda: [evaluation.evaluate(board) for board in boards])
+    rate("evaluate_batch", len(boards), lambda: evaluation.evaluate_batch(boards))
+    masks = evaluation.bitboards(boards)
+    rate("evaluate_bitboards", len(boards), lambda: evaluation.evaluate_bitboards(masks))
+
+    # Incremental updates: one push, score and pop per child of each suite
+    # position, with the per-position reset amortised over its children.
+    positions = [(board, list(board.legal_moves)) for board in boards[:len(boards) // repeat]]
+    leaves = sum(len(moves) for _, moves in positions) * repeat
+    evaluator = evaluation.IncrementalEvaluator()
+
+    def incremental():
+        for _ in range(repeat):
+            for board, moves in positions:
+                evaluator.reset(board)
+                for move in moves:
+                    evaluator.push(board, move)
+                    evaluator.score()
+                    evaluator.pop(board)
+
+    rate("incremental push/score/pop", leaves, incremental)
+
+
+async def _drive_api(path: str, payloads: List[dict], requests: int, concurrency: int) -> None:
+    import httpx
+    import app as api
+
+    latencies: List[float] = []
+    failures = 0
+    queue: "asyncio.Queue[dict]" = asyncio.Queue()
+    for index in range(requests):
+        queue.put_nowait(payloads[index % len(payloads)])
+
+    async with api.app.router.lifespan_context(api.app):
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            # Warm the worker processes so spawn cost is not counted.
+            warm = {"fen": BENCH_SUITE["middlegame"][0], "game_mode": "minimax", "depth": 1}
+            await asyncio.gather(*(client.post("/best-move/", json=warm) for _ in range(concurrency)))
+
+            async def worker():
+                nonlocal failures
+                while not queue.empty():
+                    payload = queue.get_nowait()
+                    started = time.perf_counter()
+                    response = await client.post(path, json=payload)
+                    latencies.append(time.perf_counter() - started)
+                    failures += response.status_code != 200
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+    print(f"{path:<14}{requests:>6} req  {concurrency:>3} conc  "
+          f"{requests / elapsed:>8.1f} req/s  p50 {statistics.median(latencies) * 1000:>8.1f}ms  "
+          f"p99 {_percentile(latencies, 0.99) * 1000:>8.1f}ms  failures {failures}")
+
+
+def bench_api(suite: Dict[str, List[str]], requests: int, concurrency: int, depth: int, use_cache: bool) -> None:
+    import app as api
+    from cache import ResultCache
+
+    if not use_cache:
+        api.result_cache = ResultCache(max_entries=0)
+    fens = [fen for fens in suite.values() for fen in fens]
+    asyncio.run(_drive_api("/evalbar/", [{"fen": fen} for fen in fens], requests, concurrency))
+    asyncio.run(_drive_api("/best-move/", [{"fen": fen, "game_mode": "minimax", "depth": depth}
+                                            for fen in fens], requests, concurrency))
+
+
+def bench_profile(suite: Dict[str, List[str]], depth: int, top: int) -> None:
+    searcher = Searcher()
+    timings = profiling.instrument_searcher(searcher)
+    elapsed = 0.0
+    # A plain profiler: the stats are printed, not dumped to CHESS_PROFILE_DIR.
+    profile = cProfile.Profile()
+    profile.enable()
+    for fens in suite.values():
+        for fen in fens:
+            elapsed += searcher.search(chess.Board(fen), max_depth=depth).elapsed
+    profile.disable()
+    print(f"{'phase':<10}{'seconds':>10}{'share':>8}{'calls':>10}")
+    for phase, stats in sorted(timings.report(elapsed).items(), key=lambda item: -item[1]["seconds"]):
+        print(f"{phase:<10}{stats['seconds']:>10.3f}{stats['seconds'] / elapsed:>8.1%}{stats.get('calls', ''):>10}")
+    print()
+    pstats.Stats(profile).sort_stats("cumulative").print_stats(top)
+
+
+def bench_parallel(suite: Dict[str, List[str]], depth: int, worker_counts: List[int]) -> None:
+    from parallel_search import ParallelSearch
+
+    fens = [fen for fens in suite.values() for fen in fens]
+    serial_total = 0.0
+    totals = {count: 0.0 for count in worker_counts}
+    mismatches = 0
+    searches = {count: ParallelSearch.create(count) for count in worker_counts}
+    try:
+        for search in searches.values():
+            # Start the worker processes before timing anything.
+            search.search(chess.Board(fens[0]), 1)
+        print(f"{'pos':<5}{'serial':>9}" + "".join(f"{str(count) + 'w':>9}" for count in worker_counts) + f"{'move':>8}")
+        for index, fen in enumerate(fens):
+            board = chess.Board(fen)
+            serial = Searcher(deterministic=True).search(board, max_depth=depth)
+            serial_total += serial.elapsed
+            row = f"{index:<5}{serial.elapsed:>9.2f}"
+            for count, search in searches.items():
+                result = search.search(board, depth)
+                totals[count] += result.elapsed
+                mismatches += result.score != serial.score
+                row += f"{result.elapsed:>9.2f}"
+            print(row + f"{serial.best_move.uci() if serial.best_move else '-':>8}")
+    finally:
+        for search in searches.values():
+            search.shutdown()
+    print(f"{'total':<5}{serial_total:>9.2f}" + "".join(f"{totals[count]:>9.2f}" for count in worker_counts))
+    print("speedup  " + "".join(f"{serial_total / totals[count]:>9.2f}" for count in worker_counts))
+    print(f"score mismatches against the serial search: {mismatches}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks for the search, evaluation and API.")
+    parser.add_argument("--category", action="append", choices=sorted(BENCH_SUITE),
+                        help="only use positions from this category (repeatable)")
+    commands = parser.add_subparsers(dest="command")
+
+    compare = commands.add_parser("compare", help="legacy minimax against the current search")
+    compare.add_argument("--depth", type=int, default=3)
+    compare.add_argument("--fen", action="append", help="position to benchmark (repeatable)")
+
+    search = commands.add_parser("search", help="nodes/s, time-to-depth and best-move agreement")
+    search.add_argument("--depth", type=int, default=4)
+    search.add_argument("--legacy-depth", type=int, default=3, help="0 skips the legacy comparison")
+
+    evals = commands.add_parser("eval", help="evaluation calls per second")
+    evals.add_argument("--repeat", type=int, default=500)
+
+    api = commands.add_parser("api", help="in-process latency and throughput of the HTTP endpoints")
+    api.add_argument("--requests", type=int, default=200)
+    api.add_argument("--concurrency", type=int, default=16)
+    api.add_argument("--depth", type=int, default=3)
+    api.add_argument("--cache", action="store_true", help="keep the result cache enabled")
+
+    profile = commands.add_parser("profile", help="per-phase timings and a cProfile of the search")
+    profile.add_argument("--depth", type=int, default=4)
+    profile.add_argument("--top", type=int, default=25)
+
+    parallel = commands.add_parser("parallel", help="parallel root search speedup over the serial search")
+    parallel.add_argument("--depth", type=int, default=4)
+    parallel.add_argument("--workers", type=int, action="append", help="worker count to try (repeatable)")
+
+    args = parser.parse_args()
+    suite = _suite(args.category)
+    if args.command == "search":
+        bench_search(suite, args.depth, args.legacy_depth)
+    elif args.command == "eval":
+        bench_eval(suite, args.repeat)
+    elif args.command == "api":
+        bench_api(suite, args.requests, args.concurrency, args.depth, args.cache)
+    elif args.command == "parallel":
+        bench_parallel(suite, args.depth, args.workers or [2, 4, 8])
+    elif args.command == "profile":
+        bench_profile(suite, args.depth, args.top)
+    else:
+        fens = getattr(args, "fen", None) or [fen for fens in suite.values() for fen in fens]
+        compare_search(fens, getattr(args, "depth", 3))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+import chess
+
+
+def position_key(board: chess.Board) -> str:
+    # EPD drops the move counters and only keeps a legal en passant square,
+    # so transpositions and reloaded games share an entry.
+    return board.epd()
+
+
+def source_version(*objects) -> str:
+    # Persisted results are only valid for the code that produced them, so
+    # the cache is versioned by a hash of the modules behind the results.
+    digest = hashlib.sha256()
+    for obj in objects:
+        with open(inspect.getfile(obj), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class CacheEntry:
+    __slots__ = ("depth", "time_limit", "value")
+
+    def __init__(self, depth: int, time_limit: Optional[float], value: dict):
+        self.depth = depth
+        self.time_limit = time_limit
+        self.value = value
+
+    def satisfies(self, depth: Optional[int], time_limit: Optional[float]) -> bool:
+        if depth is None and time_limit is None:
+            return True
+        if depth is not None and self.depth >= depth:
+            return True
+        return time_limit is not None and self.time_limit is not None and self.time_limit >= time_limit
+
+
+class ResultCache:
+    # LRU map from (position, mode) to the strongest result computed so far.
+    # A lookup hits when the stored result was searched at least as deep, or
+    # for at least as long, as the request asks for; a store only replaces an
+    # entry with one that is at least as deep. Rows persisted under another
+    # version are ignored and overwritten.
+    def __init__(self, max_entries: int = 100000, db_path: Optional[str] = None, version: str = ""):
+        self.max_entries = max_entries
+        self.version = version
+        self._entries: "OrderedDict[Tuple[str, str], CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            columns = {row[1] for row in self._db.execute("PRAGMA table_info(results)")}
+            if columns and "version" not in columns:
+                # Written before results were versioned, so none can be trusted.
+                self._db.execute("DROP TABLE results")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "position TEXT NOT NULL, mode TEXT NOT NULL, version TEXT NOT NULL, depth INTEGER NOT NULL, "
+                "time_limit REAL, value TEXT NOT NULL, PRIMARY KEY (position, mode))"
+            )
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls, version: str = "") -> "ResultCache":
+        # RESULT_CACHE_VERSION overrides the code version, e.g. to drop
+        # engine results after upgrading Stockfish.
+        return cls(
+            max_entries=int(os.environ.get("RESULT_CACHE_SIZE", "100000")),
+            db_path=os.environ.get("RESULT_CACHE_DB") or None,
+            version=os.environ.get("RESULT_CACHE_VERSION") or version,
+        )
+
+    @property
+    def persistent(self) -> bool:
+        return self._db is not None
+
+    def _load(self, key: Tuple[str, str]) -> Optional[CacheEntry]:
+        row = self._db.execute(
+            "SELECT depth, time_limit, value FROM results WHERE position = ? AND mode = ? AND version = ?",
+            (*key, self.version),
+        ).fetchone()
+        if row is None:
+            return None
+        return CacheEntry(row[0], row[1], json.loads(row[2]))
+
+    def _remember(self, key: Tuple[str, str], entry: CacheEntry) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, board: chess.Board, mode: str, depth: Optional[int] = None,
+            time_limit: Optional[float] = None) -> Optional[dict]:
+        key = (position_key(board), mode)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                entry = self._load(key)
+                if entry is not None:
+                    self._remember(key, entry)
+            if entry is not None and entry.satisfies(depth, time_limit):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+            self.misses += 1
+            return None
+
+    def put(self, board: chess.Board, mode: str, value: dict, depth: int = 0,
+            time_limit: Optional[float] = None) -> None:
+        key = (position_key(board), mode)
+        with self._lock:
+            current = self._entries.get(key)
+            if current is None and self._db is not None:
+                current = self._load(key)
+            if current is not None and current.depth > depth:
+                self._remember(key, current)
+                return
+            self._remember(key, CacheEntry(depth, time_limit, value))
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT INTO results (position, mode, version, depth, time_limit, value) "
+                    "VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (position, mode) DO UPDATE SET version = excluded.version, "
+                    "depth = excluded.depth, time_limit = excluded.time_limit, value = excluded.value "
+                    "WHERE excluded.depth >= results.depth OR excluded.version != results.version",
+                    (key[0], key[1], self.version, depth, time_limit, json.dumps(value)),
+                )
+                self._db.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "persistent": self.persistent,
+            "version": self.version,
+        }
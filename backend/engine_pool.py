@@ -0,0 +1,157 @@
+import os
+import queue
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+import chess
+import chess.engine
+
+
+def default_engine_path() -> str:
+    path = os.environ.get("STOCKFISH_PATH")
+    if path:
+        return path
+    if sys.platform.startswith("win"):
+        return "engine/stockfish-windows-x86-64-avx2.exe"
+    return "engine/stockfish-macos-m1-apple-silicon"
+
+
+class EnginePoolBusy(Exception):
+    pass
+
+
+class EnginePool:
+    def __init__(self, engine_path: Optional[str] = None, size: int = 2, threads: int = 1,
+                 hash_mb: int = 16, max_queue: int = 8, acquire_timeout: float = 5.0):
+        self.engine_path = engine_path or default_engine_path()
+        self.size = size
+        self.options = {"Threads": threads, "Hash": hash_mb}
+        self.acquire_timeout = acquire_timeout
+        self._idle: "queue.Queue[chess.engine.SimpleEngine]" = queue.Queue()
+        self._engines: List[chess.engine.SimpleEngine] = []
+        # At most `size` callers hold an engine and `max_queue` wait for one;
+        # anyone beyond that is rejected straight away instead of piling up.
+        self._slots = threading.BoundedSemaphore(size + max_queue)
+        self._lock = threading.Lock()
+        self.restarts = 0
+        self.closed = True
+
+    @classmethod
+    def from_env(cls) -> "EnginePool":
+        return cls(
+            engine_path=os.environ.get("STOCKFISH_PATH"),
+            size=int(os.environ.get("ENGINE_POOL_SIZE", "2")),
+            threads=int(os.environ.get("ENGINE_THREADS", "1")),
+            hash_mb=int(os.environ.get("ENGINE_HASH_MB", "16")),
+            max_queue=int(os.environ.get("ENGINE_MAX_QUEUE", "8")),
+            acquire_timeout=float(os.environ.get("ENGINE_ACQUIRE_TIMEOUT", "5.0")),
+        )
+
+    def _spawn(self) -> chess.engine.SimpleEngine:
+        engine = chess.engine.SimpleEngine.popen_uci(self.engine_path)
+        engine.configure({name: value for name, value in self.options.items()
+                          if name in engine.options})
+        with self._lock:
+            self._engines.append(engine)
+        return engine
+
+    def _discard(self, engine: chess.engine.SimpleEngine) -> None:
+        with self._lock:
+            if engine in self._engines:
+                self._engines.remove(engine)
+        try:
+            engine.close()
+        except Exception:
+            pass
+
+    def _restart(self, engine: chess.engine.SimpleEngine) -> chess.engine.SimpleEngine:
+        self._discard(engine)
+        self.restarts += 1
+        return self._spawn()
+
+    def _healthy(self, engine: chess.engine.SimpleEngine) -> bool:
+        try:
+            engine.ping()
+            return True
+        except (chess.engine.EngineError, chess.engine.EngineTerminatedError, TimeoutError):
+            return False
+
+    def start(self) -> None:
+        if not self.closed:
+            return
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+        with self._lock:
+            engines = list(self._engines)
+            self._engines.clear()
+        while True:
+            try:
+                self._idle.get_nowait()
+            except queue.Empty:
+                break
+        for engine in engines:
+            try:
+                engine.quit()
+            except Exception:
+                engine.close()
+
+    @contextmanager
+    def engine(self) -> Iterator[chess.engine.SimpleEngine]:
+        if self.closed:
+            raise EnginePoolBusy("engine pool is not running")
+        if not self._slots.acquire(blocking=False):
+            raise EnginePoolBusy("too many pending engine requests")
+        try:
+            try:
+                engine = self._idle.get(timeout=self.acquire_timeout)
+            except queue.Empty:
+                raise EnginePoolBusy("timed out waiting for a free engine")
+            if not self._healthy(engine):
+                try:
+                    engine = self._restart(engine)
+                except Exception:
+                    # Keep the dead handle queued so the next caller retries the restart.
+                    self._idle.put(engine)
+                    raise EnginePoolBusy("engine crashed and could not be restarted")
+            try:
+                yield engine
+            except (chess.engine.EngineError, chess.engine.EngineTerminatedError) as exc:
+                try:
+                    engine = self._restart(engine)
+                except Exception:
+                    # As at checkout, the dead handle goes back in the queue.
+                    raise EnginePoolBusy("engine crashed and could not be restarted") from exc
+                raise
+            finally:
+                if not self.closed:
+                    self._idle.put(engine)
+        finally:
+            self._slots.release()
+
+    def play(self, board: chess.Board, limit: chess.engine.Limit) -> chess.Move:
+        # engine() replaces an engine that fails mid-search, so one retry
+        # lands on the fresh process; a second failure is reported as busy.
+        try:
+            with self.engine() as engine:
+                return engine.play(board, limit).move
+        except chess.engine.EngineError:
+            pass
+        try:
+            with self.engine() as engine:
+                return engine.play(board, limit).move
+        except chess.engine.EngineError as exc:
+            raise EnginePoolBusy(f"engine failed during search: {exc}")
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize(),
+            "alive": len(self._engines),
+            "restarts": self.restarts,
+        }
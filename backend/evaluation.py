@@ -0,0 +1,223 @@
+from typing import List, Sequence
+
+import chess
+import numpy as np
+
+PIECE_VALUES = [0, 100, 320, 330, 500, 900, 0]
+
+# Phase weight of each piece type; 24 means all minor and major pieces are on
+# the board, 0 means only kings and pawns are left.
+PHASE_WEIGHTS = [0, 0, 1, 1, 2, 4, 0]
+MAX_PHASE = 24
+
+# Piece-square tables from White's point of view, rank 8 first.
+PAWN_TABLE = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+     50,  50,  50,  50,  50,  50,  50,  50,
+     10,  10,  20,  30,  30,  20,  10,  10,
+      5,   5,  10,  25,  25,  10,   5,   5,
+      0,   0,   0,  20,  20,   0,   0,   0,
+      5,  -5, -10,   0,   0, -10,  -5,   5,
+      5,  10,  10, -20, -20,  10,  10,   5,
+      0,   0,   0,   0,   0,   0,   0,   0,
+]
+KNIGHT_TABLE = [
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20,   0,   0,   0,   0, -20, -40,
+    -30,   0,  10,  15,  15,  10,   0, -30,
+    -30,   5,  15,  20,  20,  15,   5, -30,
+    -30,   0,  15,  20,  20,  15,   0, -30,
+    -30,   5,  10,  15,  15,  10,   5, -30,
+    -40, -20,   0,   5,   5,   0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50,
+]
+BISHOP_TABLE = [
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,  10,  10,   5,   0, -10,
+    -10,   5,   5,  10,  10,   5,   5, -10,
+    -10,   0,  10,  10,  10,  10,   0, -10,
+    -10,  10,  10,  10,  10,  10,  10, -10,
+    -10,   5,   0,   0,   0,   0,   5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20,
+]
+ROOK_TABLE = [
+      0,   0,   0,   0,   0,   0,   0,   0,
+      5,  10,  10,  10,  10,  10,  10,   5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+     -5,   0,   0,   0,   0,   0,   0,  -5,
+      0,   0,   0,   5,   5,   0,   0,   0,
+]
+QUEEN_TABLE = [
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+    -10,   0,   0,   0,   0,   0,   0, -10,
+    -10,   0,   5,   5,   5,   5,   0, -10,
+     -5,   0,   5,   5,   5,   5,   0,  -5,
+      0,   0,   5,   5,   5,   5,   0,  -5,
+    -10,   5,   5,   5,   5,   5,   0, -10,
+    -10,   0,   5,   0,   0,   0,   0, -10,
+    -20, -10, -10,  -5,  -5, -10, -10, -20,
+]
+KING_MIDDLEGAME_TABLE = [
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+     20,  20,   0,   0,   0,   0,  20,  20,
+     20,  30,  10,   0,   0,  10,  30,  20,
+]
+KING_ENDGAME_TABLE = [
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10,   0,   0, -10, -20, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  30,  40,  40,  30, -10, -30,
+    -30, -10,  20,  30,  30,  20, -10, -30,
+    -30, -30,   0,   0,   0,   0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50,
+]
+
+MIDDLEGAME_TABLES = [None, PAWN_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_MIDDLEGAME_TABLE]
+ENDGAME_TABLES = [None, PAWN_TABLE, KNIGHT_TABLE, BISHOP_TABLE, ROOK_TABLE, QUEEN_TABLE, KING_ENDGAME_TABLE]
+
+
+def _signed_tables(tables) -> List[List[List[int]]]:
+    # Indexed [color][piece_type][square] with material folded in and the
+    # sign already applied, so White is always positive.
+    signed = [[[0] * 64 for _ in range(7)] for _ in chess.COLORS]
+    for piece_type in chess.PIECE_TYPES:
+        for square in chess.SQUARES:
+            signed[chess.WHITE][piece_type][square] = PIECE_VALUES[piece_type] + tables[piece_type][square ^ 56]
+            signed[chess.BLACK][piece_type][square] = -(PIECE_VALUES[piece_type] + tables[piece_type][square])
+    return signed
+
+
+MG = _signed_tables(MIDDLEGAME_TABLES)
+EG = _signed_tables(ENDGAME_TABLES)
+
+
+def _taper(mg: int, eg: int, phase: int) -> int:
+    # Truncate toward zero so a colour-mirrored position scores exactly the
+    # negation; floor division would round Black's advantages down a point.
+    phase = min(phase, MAX_PHASE)
+    total = mg * phase + eg * (MAX_PHASE - phase)
+    return total // MAX_PHASE if total >= 0 else -(-total // MAX_PHASE)
+
+
+def evaluate(board: chess.Board) -> int:
+    # Centipawns from White's point of view.
+    mg = eg = phase = 0
+    for color in chess.COLORS:
+        mg_color = MG[color]
+        eg_color = EG[color]
+        for piece_type in chess.PIECE_TYPES:
+            for square in chess.scan_forward(board.pieces_mask(piece_type, color)):
+                mg += mg_color[piece_type][square]
+                eg += eg_color[piece_type][square]
+                phase += PHASE_WEIGHTS[piece_type]
+    return _taper(mg, eg, phase)
+
+
+class IncrementalEvaluator:
+    # Keeps the middlegame/endgame sums and game phase up to date as moves are
+    # made, so a leaf costs a couple of additions instead of a board scan.
+    # Moves must go through push()/pop() here instead of on the board directly.
+    def __init__(self):
+        self.mg = 0
+        self.eg = 0
+        self.phase = 0
+        self._stack: List[tuple] = []
+
+    def reset(self, board: chess.Board) -> None:
+        self.mg = self.eg = self.phase = 0
+        for color in chess.COLORS:
+            for piece_type in chess.PIECE_TYPES:
+                for square in chess.scan_forward(board.pieces_mask(piece_type, color)):
+                    self.mg += MG[color][piece_type][square]
+                    self.eg += EG[color][piece_type][square]
+                    self.phase += PHASE_WEIGHTS[piece_type]
+        self._stack.clear()
+
+    def score(self) -> int:
+        return _taper(self.mg, self.eg, self.phase)
+
+    def push(self, board: chess.Board, move: chess.Move) -> None:
+        self._stack.append((self.mg, self.eg, self.phase))
+        color = board.turn
+        piece_type = board.piece_type_at(move.from_square)
+        mg_own = MG[color]
+        eg_own = EG[color]
+        mg = self.mg
+        eg = self.eg
+
+        mg -= mg_own[piece_type][move.from_square]
+        eg -= eg_own[piece_type][move.from_square]
+        landed = move.promotion or piece_type
+        mg += mg_own[landed][move.to_square]
+        eg += eg_own[landed][move.to_square]
+        if move.promotion:
+            self.phase += PHASE_WEIGHTS[move.promotion]
+
+        if piece_type == chess.KING and board.is_castling(move):
+            if board.is_kingside_castling(move):
+                rook_from, rook_to = move.to_square + 1, move.to_square - 1
+            else:
+                rook_from, rook_to = move.to_square - 2, move.to_square + 1
+            mg += mg_own[chess.ROOK][rook_to] - mg_own[chess.ROOK][rook_from]
+            eg += eg_own[chess.ROOK][rook_to] - eg_own[chess.ROOK][rook_from]
+        else:
+            if piece_type == chess.PAWN and board.is_en_passant(move):
+                captured_square = move.to_square - 8 if color == chess.WHITE else move.to_square + 8
+                captured = chess.PAWN
+            else:
+                captured_square = move.to_square
+                captured = board.piece_type_at(move.to_square)
+            if captured:
+                mg -= MG[not color][captured][captured_square]
+                eg -= EG[not color][captured][captured_square]
+                self.phase -= PHASE_WEIGHTS[captured]
+
+        self.mg = mg
+        self.eg = eg
+        board.push(move)
+
+    def pop(self, board: chess.Board) -> chess.Move:
+        self.mg, self.eg, self.phase = self._stack.pop()
+        return board.pop()
+
+
+def _table_array(tables) -> np.ndarray:
+    # Rows follow the order of bitboards(): White pawn..king, then Black.
+    return np.array([tables[color][piece_type] for color in (chess.WHITE, chess.BLACK)
+                     for piece_type in chess.PIECE_TYPES], dtype=np.int64)
+
+
+MG_ARRAY = _table_array(MG)
+EG_ARRAY = _table_array(EG)
+PHASE_ARRAY = np.array(PHASE_WEIGHTS[1:] * 2, dtype=np.int64)
+
+
+def bitboards(boards: Sequence[chess.Board]) -> np.ndarray:
+    # One row of 12 piece bitboards per position.
+    return np.array([[board.pieces_mask(piece_type, color) for color in (chess.WHITE, chess.BLACK)
+                      for piece_type in chess.PIECE_TYPES] for board in boards], dtype="<u8").reshape(-1, 12)
+
+
+def evaluate_bitboards(masks: np.ndarray) -> np.ndarray:
+    masks = np.ascontiguousarray(masks, dtype="<u8")
+    squares = np.unpackbits(masks.view(np.uint8).reshape(len(masks), 12, 8), axis=-1, bitorder="little")
+    squares = squares.astype(np.int64)
+    mg = np.einsum("nps,ps->n", squares, MG_ARRAY)
+    eg = np.einsum("nps,ps->n", squares, EG_ARRAY)
+    phase = np.minimum(squares.sum(axis=2) @ PHASE_ARRAY, MAX_PHASE)
+    total = mg * phase + eg * (MAX_PHASE - phase)
+    return np.sign(total) * (np.abs(total) // MAX_PHASE)
+
+
+def evaluate_batch(boards: Sequence[chess.Board]) -> np.ndarray:
+    return evaluate_bitboards(bitboards(boards))
@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import List
+
+import chess
+import websockets
+
+
+async def play_game(url: str, room: str, moves: int, latencies: List[float], errors: List[str]) -> int:
+    # Two clients share a room and take turns; each move is timed from send
+    # until the opponent's socket receives the broadcast.
+    async with websockets.connect(f"{url}/{room}") as white, websockets.connect(f"{url}/{room}") as black:
+        await white.recv()
+        await black.recv()
+        board = chess.Board()
+        players = {chess.WHITE: (white, black), chess.BLACK: (black, white)}
+        played = 0
+        while played < moves and not board.is_game_over():
+            mover, opponent = players[board.turn]
+            move = random.choice(list(board.legal_moves))
+            message = {"from": chess.square_name(move.from_square), "to": chess.square_name(move.to_square)}
+            if move.promotion:
+                message["promotion"] = chess.piece_symbol(move.promotion)
+            started = time.perf_counter()
+            await mover.send(json.dumps(message))
+            reply = json.loads(await opponent.recv())
+            while reply.get("type") == "state":  # seat updates as the room fills
+                reply = json.loads(await opponent.recv())
+            latencies.append(time.perf_counter() - started)
+            if reply.get("type") != "move" or reply.get("from") != message["from"]:
+                errors.append(f"{room}: unexpected reply {reply}")
+                break
+            board.push(move)
+            played += 1
+        return played
+
+
+async def run(url: str, games: int, moves: int, concurrency: int) -> None:
+    latencies: List[float] = []
+    errors: List[str] = []
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> int:
+        async with limit:
+            try:
+                return await play_game(url, f"load-{index}", moves, latencies, errors)
+            except (OSError, websockets.WebSocketException) as exc:
+                errors.append(f"load-{index}: {exc!r}")
+                return 0
+
+    started = time.perf_counter()
+    played = sum(await asyncio.gather(*(one(index) for index in range(games))))
+    elapsed = time.perf_counter() - started
+
+    print(f"games: {games}  clients: {games * 2}  moves: {played}  time: {elapsed:.2f}s")
+    print(f"throughput: {played / elapsed:.0f} moves/s")
+    if latencies:
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"latency: p50 {statistics.median(latencies) * 1000:.1f}ms  p99 {p99 * 1000:.1f}ms")
+    if errors:
+        print(f"errors: {len(errors)} (first: {errors[0]})")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Play many concurrent games against the websocket hub.")
+    parser.add_argument("--url", default="ws://localhost:8000/ws/chess")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--moves", type=int, default=40, help="moves per game")
+    parser.add_argument("--concurrency", type=int, default=1000, help="games running at once")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.games, args.moves, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
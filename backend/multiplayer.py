@@ -0,0 +1,275 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Dict, List, Optional, Set
+
+import chess
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+SEND_QUEUE_SIZE = int(os.environ.get("WS_SEND_QUEUE_SIZE", "64"))
+SEND_TIMEOUT = float(os.environ.get("WS_SEND_TIMEOUT", "5.0"))
+
+PROMOTIONS = {"n": chess.KNIGHT, "b": chess.BISHOP, "r": chess.ROOK, "q": chess.QUEEN}
+COLOR_NAMES = {chess.WHITE: "white", chess.BLACK: "black"}
+
+
+class Connection:
+    # Outgoing messages go through a bounded queue drained by a dedicated
+    # task, so a broadcast never waits on a slow client. A client whose queue
+    # fills up or whose socket stalls is dropped.
+    def __init__(self, websocket: WebSocket, room: "Room"):
+        self.websocket = websocket
+        self.room = room
+        self.color: Optional[chess.Color] = None  # None for spectators
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=SEND_QUEUE_SIZE)
+        self.closed = False
+        self._sender: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._sender = asyncio.create_task(self._send_loop())
+
+    async def _send_loop(self) -> None:
+        try:
+            while True:
+                batch = [await self.queue.get()]
+                while not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                await asyncio.wait_for(self._send_batch(batch), SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Timed out or the socket went away; the hub cleans up the rest.
+            self.room.hub.drop(self)
+
+    async def _send_batch(self, batch) -> None:
+        for text in batch:
+            await self.websocket.send_text(text)
+
+    def send(self, text: str) -> bool:
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def send_json(self, message: dict) -> bool:
+        return self.send(json.dumps(message))
+
+    def stop(self) -> None:
+        self.closed = True
+        if self._sender is not None and self._sender is not asyncio.current_task():
+            self._sender.cancel()
+
+    def close(self, code: int = 1000) -> None:
+        if self.closed:
+            return
+        self.stop()
+        asyncio.create_task(self._close_socket(code))
+
+    async def _close_socket(self, code: int) -> None:
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), SEND_TIMEOUT)
+        except Exception:
+            pass
+
+
+class Room:
+    # The room's board is authoritative. The first two connections take the
+    # white and black seats and only the seat whose turn it is may move;
+    # everyone else watches. A seat freed by a leaving player goes to the
+    # next connection that joins. A player alone in the room may move, undo
+    # and reset for both sides, as in a local game.
+    def __init__(self, room_id: str, hub: "RoomHub"):
+        self.room_id = room_id
+        self.hub = hub
+        self.board = chess.Board()
+        self.history: List[str] = []  # SAN of each move on the board
+        self.connections: Set[Connection] = set()
+        self.seats: Dict[chess.Color, Optional[Connection]] = {chess.WHITE: None, chess.BLACK: None}
+        self.reset_votes: Set[chess.Color] = set()
+
+    def join(self, connection: Connection) -> bool:
+        # Returns whether the connection took a seat.
+        self.connections.add(connection)
+        for color in chess.COLORS:
+            if self.seats[color] is None:
+                self.seats[color] = connection
+                connection.color = color
+                return True
+        return False
+
+    def leave(self, connection: Connection) -> bool:
+        # Returns whether a seat was freed.
+        self.connections.discard(connection)
+        if connection.color is not None and self.seats[connection.color] is connection:
+            self.seats[connection.color] = None
+            self.reset_votes.clear()
+            return True
+        return False
+
+    def alone(self, connection: Connection) -> bool:
+        return connection.color is not None and self.seats[not connection.color] is None
+
+    def state(self, connection: Connection) -> dict:
+        return {
+            "type": "state",
+            "room": self.room_id,
+            "color": COLOR_NAMES.get(connection.color),
+            "players": {name: self.seats[color] is not None for color, name in COLOR_NAMES.items()},
+            "fen": self.board.fen(),
+            "moves": self.history,
+        }
+
+    def send_error(self, connection: Connection, error: str) -> None:
+        # Carries the room's position so the client can resynchronise.
+        connection.send_json({**self.state(connection), "type": "error", "error": error})
+
+    def broadcast_state(self) -> None:
+        # Each client is told its own seat, so this one is built per connection.
+        for connection in list(self.connections):
+            if not connection.send_json(self.state(connection)):
+                logger.info("dropping slow websocket client in room %s", self.room_id)
+                self.hub.drop(connection, code=1013)
+
+    def broadcast(self, message: dict, exclude: Optional[Connection] = None) -> None:
+        # Serialize once and only enqueue, so fan-out cost does not depend on
+        # how fast any one client reads.
+        text = json.dumps(message)
+        for connection in list(self.connections):
+            if connection is exclude:
+                continue
+            if not connection.send(text):
+                logger.info("dropping slow websocket client in room %s", self.room_id)
+                self.hub.drop(connection, code=1013)
+
+    def parse_move(self, data: dict) -> Optional[chess.Move]:
+        try:
+            from_square = chess.parse_square(data["from"])
+            to_square = chess.parse_square(data["to"])
+        except (KeyError, TypeError, ValueError):
+            return None
+        promotion = None
+        if data.get("promotion"):
+            promotion = PROMOTIONS.get(str(data["promotion"]).lower())
+            if promotion is None:
+                return None
+        elif (self.board.piece_type_at(from_square) == chess.PAWN
+              and chess.square_rank(to_square) in (0, 7)):
+            # The client auto-queens without saying so.
+            promotion = chess.QUEEN
+        move = chess.Move(from_square, to_square, promotion)
+        return move if self.board.is_legal(move) else None
+
+    def handle(self, connection: Connection, data: dict) -> None:
+        kind = data.get("type", "move")
+        if kind == "move":
+            self.play(connection, data)
+        elif kind == "undo":
+            self.undo(connection)
+        elif kind == "reset":
+            self.reset(connection)
+        else:
+            self.send_error(connection, f"unknown message type: {kind}")
+
+    def undo(self, connection: Connection) -> None:
+        # Only the side that made the last move may take it back.
+        if connection.color is None:
+            self.send_error(connection, "spectators cannot change the game")
+            return
+        if not self.board.move_stack:
+            self.send_error(connection, "no move to undo")
+            return
+        if connection.color == self.board.turn and not self.alone(connection):
+            self.send_error(connection, "only the player who made the last move can undo it")
+            return
+        self.board.pop()
+        self.history.pop()
+        self.reset_votes.clear()
+        self.broadcast_state()
+
+    def reset(self, connection: Connection) -> None:
+        # A finished game can be reset by either player; otherwise both
+        # players have to ask for it.
+        if connection.color is None:
+            self.send_error(connection, "spectators cannot change the game")
+            return
+        self.reset_votes.add(connection.color)
+        if not (self.board.is_game_over() or self.alone(connection) or len(self.reset_votes) == 2):
+            self.broadcast({"type": "reset_offer", "from": COLOR_NAMES[connection.color]}, exclude=connection)
+            return
+        self.board.reset()
+        self.history.clear()
+        self.reset_votes.clear()
+        self.broadcast_state()
+
+    def play(self, connection: Connection, data: dict) -> None:
+        if connection.color is None:
+            self.send_error(connection, "spectators cannot move")
+            return
+        if connection.color != self.board.turn and not self.alone(connection):
+            self.send_error(connection, "not your turn")
+            return
+        move = self.parse_move(data)
+        if move is None:
+            self.send_error(connection, "illegal move")
+            return
+        san = self.board.san(move)
+        self.board.push(move)
+        self.history.append(san)
+        self.reset_votes.clear()
+        message = {
+            "type": "move",
+            "from": chess.square_name(move.from_square),
+            "to": chess.square_name(move.to_square),
+            "san": san,
+            "fen": self.board.fen(),
+        }
+        if move.promotion:
+            message["promotion"] = chess.piece_symbol(move.promotion)
+        self.broadcast(message, exclude=connection)
+
+
+class RoomHub:
+    def __init__(self):
+        self.rooms: Dict[str, Room] = {}
+
+    async def connect(self, websocket: WebSocket, room_id: str) -> Connection:
+        await websocket.accept()
+        room = self.rooms.get(room_id)
+        if room is None:
+            room = self.rooms[room_id] = Room(room_id, self)
+        connection = Connection(websocket, room)
+        seated = room.join(connection)
+        connection.start()
+        if seated:
+            # Players learn that their opponent arrived.
+            room.broadcast_state()
+        else:
+            connection.send_json(room.state(connection))
+        return connection
+
+    def disconnect(self, connection: Connection) -> None:
+        connection.stop()
+        self._leave(connection)
+
+    def drop(self, connection: Connection, code: int = 1011) -> None:
+        connection.close(code)
+        self._leave(connection)
+
+    def _leave(self, connection: Connection) -> None:
+        room = connection.room
+        if room.leave(connection):
+            room.broadcast_state()
+        if not room.connections and self.rooms.get(room.room_id) is room:
+            del self.rooms[room.room_id]
+
+    def stats(self) -> dict:
+        return {
+            "rooms": len(self.rooms),
+            "connections": sum(len(room.connections) for room in self.rooms.values()),
+        }
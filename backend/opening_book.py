@@ -0,0 +1,167 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import struct
+import tempfile
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import chess
+import chess.polyglot
+
+BOOK_DIR = Path(__file__).resolve().parent
+BOOK_PATH = BOOK_DIR / "book.bin"
+# Hash of the sources a book was compiled from, kept next to it. File mtimes
+# are no use here: a git checkout writes files in arbitrary order.
+DIGEST_SUFFIX = ".sha256"
+SOURCE_PATTERN = "eco*.json"
+
+# Polyglot book entry: key, move, weight, learn (big-endian, sorted by key).
+ENTRY_STRUCT = struct.Struct(">QHHI")
+
+
+def source_paths(directory: Path = BOOK_DIR) -> List[Path]:
+    return sorted(directory.glob(SOURCE_PATTERN))
+
+
+def _encode_move(board: chess.Board, move: chess.Move) -> int:
+    # Polyglot writes castling as the king capturing its own rook.
+    to_square = move.to_square
+    if board.is_castling(move):
+        to_square = chess.square(7 if board.is_kingside_castling(move) else 0, chess.square_rank(move.from_square))
+    promotion = move.promotion - 1 if move.promotion else 0
+    return to_square | move.from_square << 6 | promotion << 12
+
+
+MOVE_NUMBER = re.compile(r"^\d+\.*")
+
+
+def _line_moves(pgn_moves: str) -> Iterable[str]:
+    # Move numbers may stand alone ("1. e4") or be glued to the SAN ("1.e4").
+    for token in pgn_moves.split():
+        san = MOVE_NUMBER.sub("", token)
+        if san:
+            yield san
+
+
+def collect_entries(paths: Iterable[Path]) -> Dict[Tuple[int, int], int]:
+    # Every position along every ECO line gets its next move as a book move,
+    # weighted by how many named lines continue that way.
+    weights: Dict[Tuple[int, int], int] = defaultdict(int)
+    for path in paths:
+        with open(path, 'r') as f:
+            openings = json.load(f)
+        for opening in openings.values():
+            board = chess.Board()
+            try:
+                for san in _line_moves(opening["moves"]):
+                    move = board.parse_san(san)
+                    weights[(chess.polyglot.zobrist_hash(board), _encode_move(board, move))] += 1
+                    board.push(move)
+            except (KeyError, ValueError):
+                continue
+    return weights
+
+
+def sources_digest(paths: Iterable[Path]) -> str:
+    # The compiler is hashed along with the sources, so changing how lines
+    # are read also rebuilds the book.
+    digest = hashlib.sha256(Path(__file__).read_bytes())
+    for path in paths:
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _digest_path(output: Path) -> Path:
+    return output.with_name(output.name + DIGEST_SUFFIX)
+
+
+def _write_atomic(output: Path, data: bytes) -> None:
+    # A unique temp file per writer, so concurrent builds never hand a reader
+    # a partly written book.
+    with tempfile.NamedTemporaryFile(dir=output.parent, prefix=output.name, suffix=".tmp", delete=False) as f:
+        f.write(data)
+    os.chmod(f.name, 0o644)  # mkstemp creates files readable by the owner only
+    os.replace(f.name, output)
+
+
+def compile_book(paths: Optional[Iterable[Path]] = None, output: Path = BOOK_PATH) -> int:
+    paths = source_paths() if paths is None else list(paths)
+    weights = collect_entries(paths)
+    _write_atomic(output, b"".join(ENTRY_STRUCT.pack(key, move, min(weight, 0xFFFF), 0)
+                                   for (key, move), weight in sorted(weights.items())))
+    _write_atomic(_digest_path(output), sources_digest(paths).encode())
+    return len(weights)
+
+
+def book_is_stale(paths: Optional[Iterable[Path]] = None, output: Path = BOOK_PATH) -> bool:
+    paths = source_paths() if paths is None else list(paths)
+    try:
+        built_from = _digest_path(output).read_text().strip()
+    except OSError:
+        return True
+    return not output.exists() or built_from != sources_digest(paths)
+
+
+def ensure_book(paths: Optional[Iterable[Path]] = None, output: Path = BOOK_PATH) -> bool:
+    # Rebuilds the book if its sources changed. Call it once from the parent
+    # process before starting workers; lookups never compile.
+    paths = source_paths() if paths is None else list(paths)
+    if not book_is_stale(paths, output):
+        return False
+    compile_book(paths, output)
+    return True
+
+
+class OpeningBook:
+    # The compiled book is a sorted polyglot file that python-chess memory-maps
+    # and binary-searches, so nothing is parsed until the first lookup and the
+    # index lives in the page cache rather than in Python objects. Building it
+    # is left to ensure_book() or the command line.
+    def __init__(self, path: Path = BOOK_PATH):
+        self.path = Path(path)
+        self._reader: Optional[chess.polyglot.MemoryMappedReader] = None
+        self._lock = threading.Lock()
+
+    def _open(self) -> Optional[chess.polyglot.MemoryMappedReader]:
+        with self._lock:
+            if self._reader is None and self.path.exists():
+                self._reader = chess.polyglot.open_reader(self.path)
+            return self._reader
+
+    def moves(self, board: chess.Board) -> List[chess.polyglot.Entry]:
+        reader = self._reader or self._open()
+        if reader is None:
+            return []
+        return list(reader.find_all(board))
+
+    def get_move(self, board: chess.Board) -> Optional[chess.Move]:
+        entries = self.moves(board)
+        if not entries:
+            return None
+        return random.choices([entry.move for entry in entries], [entry.weight for entry in entries])[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compile the ECO JSON files into a polyglot opening book.")
+    parser.add_argument("sources", nargs="*", type=Path, help=f"ECO JSON files (default: {SOURCE_PATTERN})")
+    parser.add_argument("--output", type=Path, default=BOOK_PATH)
+    args = parser.parse_args()
+    count = compile_book(args.sources or None, args.output)
+    print(f"wrote {count} book entries to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
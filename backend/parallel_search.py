@@ -0,0 +1,134 @@
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, Optional
+
+import chess
+
+import workers
+from search import INFINITY, MATE_SCORE, SearchResult, Searcher
+
+# One shared alpha per concurrent parallel search. Workers read their slot
+# before searching a root move and raise it after an exact score, so every
+# process prunes against the best score found so far by any of them.
+_shared_alpha = None
+_root_searcher: Optional[Searcher] = None
+
+
+class ParallelSearchBusy(Exception):
+    pass
+
+
+def init_worker(shared_alpha) -> None:
+    global _shared_alpha
+    _shared_alpha = shared_alpha
+
+
+def search_root_move(fen: str, move_uci: str, depth: int, slot: int) -> dict:
+    global _root_searcher
+    if _root_searcher is None:
+        _root_searcher = Searcher(deterministic=True)
+    alpha = _shared_alpha[slot]
+    result = _root_searcher.search_move(chess.Board(fen), chess.Move.from_uci(move_uci), depth, alpha)
+    exact = result.score >= alpha
+    if exact:
+        with _shared_alpha.get_lock():
+            if result.score > _shared_alpha[slot]:
+                _shared_alpha[slot] = result.score
+    return {
+        "score": result.score,
+        "exact": exact,
+        "pv": [move.uci() for move in result.pv],
+        "nodes": result.nodes,
+        "qnodes": result.qnodes,
+        "tt_probes": _root_searcher.tt.probes,
+        "tt_hits": _root_searcher.tt.hits,
+    }
+
+
+class ParallelSearch:
+    # Splits the root moves of a fixed-depth search across the worker pool.
+    # The most promising move is searched first to set a useful alpha, then
+    # the rest run concurrently against the shared bound. Every move that
+    # ties the best score is searched with a window that still admits it, so
+    # the chosen move and score only depend on the position and depth: ties
+    # go to the earliest move in the root ordering.
+    def __init__(self, executor: ProcessPoolExecutor, shared_alpha, slots: int, acquire_timeout: float = 5.0):
+        self.executor = executor
+        self._shared_alpha = shared_alpha
+        self.acquire_timeout = acquire_timeout
+        self._free_slots: "queue.Queue[int]" = queue.Queue()
+        for slot in range(slots):
+            self._free_slots.put(slot)
+
+    @classmethod
+    def create(cls, workers_count: Optional[int] = None, slots: Optional[int] = None) -> "ParallelSearch":
+        context = multiprocessing.get_context("spawn")
+        slots = slots or int(os.environ.get("PARALLEL_SEARCH_SLOTS", "8"))
+        shared_alpha = context.Array("i", slots)
+        executor = workers.create_pool(workers_count, initializer=init_worker, initargs=(shared_alpha,))
+        return cls(executor, shared_alpha, slots,
+                   acquire_timeout=float(os.environ.get("PARALLEL_SEARCH_ACQUIRE_TIMEOUT", "5.0")))
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def root_moves(self, board: chess.Board, depth: int) -> List[chess.Move]:
+        # A shallow serial search picks the first move; the others follow the
+        # searcher's static ordering, which is itself deterministic.
+        searcher = Searcher(deterministic=True)
+        moves = searcher.ordered_moves(board, None, 0)
+        if depth > 2 and len(moves) > 1:
+            first = searcher.search(board, max_depth=min(2, depth - 1)).best_move
+            moves.remove(first)
+            moves.insert(0, first)
+        return moves
+
+    def search(self, board: chess.Board, depth: int) -> SearchResult:
+        started = time.perf_counter()
+        moves = self.root_moves(board, depth)
+        if not moves:
+            score = -MATE_SCORE if board.is_checkmate() else 0
+            return SearchResult(best_move=None, score=score, depth=depth, elapsed=time.perf_counter() - started)
+
+        fen = board.fen()
+        try:
+            slot = self._free_slots.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            raise ParallelSearchBusy("too many parallel searches in progress")
+        try:
+            with self._shared_alpha.get_lock():
+                self._shared_alpha[slot] = -INFINITY
+            results = {0: self.executor.submit(search_root_move, fen, moves[0].uci(), depth, slot).result()}
+            pending = {self.executor.submit(search_root_move, fen, move.uci(), depth, slot): index
+                       for index, move in enumerate(moves[1:], start=1)}
+            try:
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[pending.pop(future)] = future.result()
+            finally:
+                # Tasks already running cannot be cancelled; let them finish
+                # so none writes into this slot after it is handed out again.
+                for future in pending:
+                    future.cancel()
+                wait(pending)
+        finally:
+            self._free_slots.put(slot)
+
+        best_index = min((index for index in results if results[index]["exact"]),
+                         key=lambda index: (-results[index]["score"], index))
+        best = results[best_index]
+        probes = sum(result["tt_probes"] for result in results.values())
+        return SearchResult(
+            best_move=moves[best_index],
+            score=best["score"],
+            depth=depth,
+            pv=[chess.Move.from_uci(uci) for uci in best["pv"]],
+            nodes=sum(result["nodes"] for result in results.values()),
+            qnodes=sum(result["qnodes"] for result in results.values()),
+            tt_hit_rate=sum(result["tt_hits"] for result in results.values()) / probes if probes else 0.0,
+            elapsed=time.perf_counter() - started,
+        )
@@ -0,0 +1,90 @@
+import cProfile
+import functools
+import itertools
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+# CHESS_PROFILE is a comma-separated list of what to collect:
+#   phases   - wall time and call counts per search phase, returned with results
+#   cprofile - a cProfile dump per search, written to CHESS_PROFILE_DIR
+PROFILE_MODES = {mode.strip() for mode in os.environ.get("CHESS_PROFILE", "").split(",") if mode.strip()}
+PROFILE_DIR = Path(os.environ.get("CHESS_PROFILE_DIR", "profiles"))
+
+_dump_counter = itertools.count()
+
+
+def phases_enabled() -> bool:
+    return "phases" in PROFILE_MODES
+
+
+def cprofile_enabled() -> bool:
+    return "cprofile" in PROFILE_MODES
+
+
+class PhaseTimings:
+    def __init__(self):
+        self.seconds: Dict[str, float] = {}
+        self.calls: Dict[str, int] = {}
+
+    def reset(self) -> None:
+        for phase in self.seconds:
+            self.seconds[phase] = 0.0
+            self.calls[phase] = 0
+
+    def wrap(self, phase: str, func):
+        seconds = self.seconds
+        calls = self.calls
+        seconds.setdefault(phase, 0.0)
+        calls.setdefault(phase, 0)
+        clock = time.perf_counter
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            started = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                seconds[phase] += clock() - started
+                calls[phase] += 1
+        return timed
+
+    def report(self, total: Optional[float] = None) -> dict:
+        report = {phase: {"seconds": round(self.seconds[phase], 4), "calls": self.calls[phase]}
+                  for phase in self.seconds}
+        if total is not None:
+            report["other"] = {"seconds": round(max(total - sum(self.seconds.values()), 0.0), 4)}
+        return report
+
+
+def instrument_searcher(searcher) -> PhaseTimings:
+    # Swaps the searcher's hot methods for timed wrappers on this instance
+    # only, so an uninstrumented searcher pays nothing.
+    timings = PhaseTimings()
+    searcher.ordered_moves = timings.wrap("movegen", searcher.ordered_moves)
+    searcher.capture_moves = timings.wrap("movegen", searcher.capture_moves)
+    searcher.evaluate = timings.wrap("evaluate", searcher.evaluate)
+    searcher.position_key = timings.wrap("hash", searcher.position_key)
+    searcher.tt.probe = timings.wrap("tt", searcher.tt.probe)
+    searcher.tt.store = timings.wrap("tt", searcher.tt.store)
+    searcher.evaluator.push = timings.wrap("make", searcher.evaluator.push)
+    searcher.evaluator.pop = timings.wrap("unmake", searcher.evaluator.pop)
+    searcher.phase_timings = timings
+    return timings
+
+
+@contextmanager
+def cprofile_section(name: str, enabled: Optional[bool] = None) -> Iterator[Optional[cProfile.Profile]]:
+    if not (cprofile_enabled() if enabled is None else enabled):
+        yield None
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.disable()
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(PROFILE_DIR / f"{name}-{os.getpid()}-{next(_dump_counter)}.prof")
@@ -0,0 +1,368 @@
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import chess
+import chess.polyglot
+
+from evaluation import PIECE_VALUES, IncrementalEvaluator
+
+MATE_SCORE = 100000
+MATE_BOUND = MATE_SCORE - 1000
+INFINITY = MATE_SCORE + 1
+
+MAX_PLY = 128
+ORDER_VALUES = [0, 1, 3, 3, 5, 9, 20]
+DELTA_MARGIN = 200
+
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class TranspositionTable:
+    # Fixed number of slots indexed by the low bits of the Zobrist key. A slot
+    # is overwritten when the new entry is at least as deep, or when the old
+    # one was left over from an earlier search.
+    def __init__(self, size: int = 1 << 18):
+        self.size = size
+        self.slots: List[Optional[tuple]] = [None] * size
+        self.generation = 0
+        self.probes = 0
+        self.hits = 0
+
+    def new_search(self) -> None:
+        self.generation += 1
+        self.probes = 0
+        self.hits = 0
+
+    def clear(self) -> None:
+        self.slots = [None] * self.size
+        self.new_search()
+
+    def probe(self, key: int) -> Optional[tuple]:
+        self.probes += 1
+        entry = self.slots[key % self.size]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key: int, depth: int, score: int, flag: int, move: Optional[chess.Move]) -> None:
+        index = key % self.size
+        entry = self.slots[index]
+        if entry is None or entry[5] != self.generation or entry[0] == key or depth >= entry[1]:
+            if move is None and entry is not None and entry[0] == key:
+                move = entry[4]
+            self.slots[index] = (key, depth, score, flag, move, self.generation)
+
+    def hit_rate(self) -> float:
+        return self.hits / self.probes if self.probes else 0.0
+
+
+@dataclass
+class SearchResult:
+    best_move: Optional[chess.Move]
+    score: int
+    depth: int
+    pv: List[chess.Move] = field(default_factory=list)
+    nodes: int = 0
+    qnodes: int = 0
+    tt_hit_rate: float = 0.0
+    elapsed: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "best_move": self.best_move.uci() if self.best_move else None,
+            "score": self.score,
+            "depth": self.depth,
+            "pv": [move.uci() for move in self.pv],
+            "nodes": self.nodes,
+            "qnodes": self.qnodes,
+            "tt_hit_rate": round(self.tt_hit_rate, 4),
+            "time": round(self.elapsed, 4),
+        }
+
+
+class SearchAborted(Exception):
+    pass
+
+
+def _score_to_tt(score: int, ply: int) -> int:
+    # Mate scores are stored relative to the node so they stay valid when the
+    # same position is reached at a different ply.
+    if score > MATE_BOUND:
+        return score + ply
+    if score < -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def _score_from_tt(score: int, ply: int) -> int:
+    if score > MATE_BOUND:
+        return score - ply
+    if score < -MATE_BOUND:
+        return score + ply
+    return score
+
+
+class Searcher:
+    # With deterministic=True the score for a given position and depth does
+    # not depend on the search window or on what the TT saw before: TT
+    # cutoffs need an entry of exactly the same depth and quiescence does no
+    # delta pruning. The parallel root search relies on this.
+    def __init__(self, tt: Optional[TranspositionTable] = None, deterministic: bool = False):
+        self.tt = tt or TranspositionTable()
+        self.deterministic = deterministic
+        self.evaluator = IncrementalEvaluator()
+        self.nodes = 0
+        self.qnodes = 0
+        self.killers: List[List[Optional[chess.Move]]] = [[None, None] for _ in range(MAX_PLY)]
+        self.history: List[int] = [0] * (2 * 64 * 64)
+        self._deadline: Optional[float] = None
+        self._node_limit: Optional[int] = None
+
+    def evaluate(self, board: chess.Board) -> int:
+        # The evaluator scores from White's side; the search works from the
+        # side to move.
+        score = self.evaluator.score()
+        return score if board.turn == chess.WHITE else -score
+
+    def position_key(self, board: chess.Board) -> int:
+        return chess.polyglot.zobrist_hash(board)
+
+    def _check_budget(self) -> None:
+        if self._node_limit is not None and self.nodes >= self._node_limit:
+            raise SearchAborted()
+        if self._deadline is not None and self.nodes & 1023 == 0 and time.perf_counter() >= self._deadline:
+            raise SearchAborted()
+
+    def _capture_score(self, board: chess.Board, move: chess.Move) -> int:
+        # MVV-LVA: most valuable victim first, cheapest attacker breaks ties.
+        if board.is_en_passant(move):
+            victim = chess.PAWN
+        else:
+            victim = board.piece_type_at(move.to_square) or 0
+        attacker = board.piece_type_at(move.from_square)
+        score = ORDER_VALUES[victim] * 10 - ORDER_VALUES[attacker]
+        if move.promotion:
+            score += ORDER_VALUES[move.promotion] * 10
+        return score
+
+    def ordered_moves(self, board: chess.Board, tt_move: Optional[chess.Move], ply: int) -> List[chess.Move]:
+        killers = self.killers[ply]
+        history = self.history
+        side = 64 * 64 if board.turn == chess.WHITE else 0
+        scored = []
+        for move in board.legal_moves:
+            if move == tt_move:
+                score = 1 << 30
+            elif move.promotion or board.is_capture(move):
+                score = (1 << 28) + self._capture_score(board, move)
+            elif move == killers[0]:
+                score = (1 << 27) + 1
+            elif move == killers[1]:
+                score = 1 << 27
+            else:
+                score = history[side + move.from_square * 64 + move.to_square]
+            scored.append((score, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def capture_moves(self, board: chess.Board) -> List[chess.Move]:
+        moves = list(board.generate_legal_captures())
+        moves.extend(board.generate_legal_moves(board.pawns, (chess.BB_RANK_1 | chess.BB_RANK_8) & ~board.occupied))
+        moves.sort(key=lambda move: self._capture_score(board, move), reverse=True)
+        return moves
+
+    def _remember_cutoff(self, board: chess.Board, move: chess.Move, depth: int, ply: int) -> None:
+        killers = self.killers[ply]
+        if move != killers[0]:
+            killers[1] = killers[0]
+            killers[0] = move
+        side = 64 * 64 if board.turn == chess.WHITE else 0
+        self.history[side + move.from_square * 64 + move.to_square] += depth * depth
+
+    def quiescence(self, board: chess.Board, alpha: int, beta: int, ply: int, qdepth: int = 0) -> int:
+        self.nodes += 1
+        self.qnodes += 1
+        self._check_budget()
+
+        if ply >= MAX_PLY - 1:
+            return self.evaluate(board)
+        if qdepth == 0 and board.is_check():
+            # Evasions are searched on entry so a mate right at the horizon is
+            # not scored as a quiet position; deeper down only captures count.
+            moves = self.ordered_moves(board, None, ply)
+            if not moves:
+                return -MATE_SCORE + ply
+            stand_pat = best_score = -INFINITY
+        else:
+            stand_pat = best_score = self.evaluate(board)
+            if best_score >= beta:
+                return best_score
+            if best_score > alpha:
+                alpha = best_score
+            moves = self.capture_moves(board)
+
+        for move in moves:
+            if stand_pat > -INFINITY and not move.promotion and not self.deterministic:
+                # Delta pruning: skip captures that cannot lift the score to
+                # alpha even with a generous positional margin.
+                victim = chess.PAWN if board.is_en_passant(move) else board.piece_type_at(move.to_square)
+                if stand_pat + PIECE_VALUES[victim] + DELTA_MARGIN <= alpha:
+                    continue
+            self.evaluator.push(board, move)
+            score = -self.quiescence(board, -beta, -alpha, ply + 1, qdepth + 1)
+            self.evaluator.pop(board)
+            if score > best_score:
+                best_score = score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+        return best_score
+
+    def negamax(self, board: chess.Board, depth: int, alpha: int, beta: int, ply: int) -> int:
+        if depth <= 0 or ply >= MAX_PLY - 1:
+            return self.quiescence(board, alpha, beta, ply)
+
+        self.nodes += 1
+        self._check_budget()
+
+        if board.is_insufficient_material():
+            return 0
+
+        key = self.position_key(board)
+        entry = self.tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            tt_move = entry[4]
+            if ply > 0 and (entry[1] == depth if self.deterministic else entry[1] >= depth):
+                score = _score_from_tt(entry[2], ply)
+                if entry[3] == EXACT:
+                    return score
+                if entry[3] == LOWER and score >= beta:
+                    return score
+                if entry[3] == UPPER and score <= alpha:
+                    return score
+
+        moves = self.ordered_moves(board, tt_move, ply)
+        if not moves:
+            return -MATE_SCORE + ply if board.is_check() else 0
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = None
+        for move in moves:
+            quiet = not (move.promotion or board.is_capture(move))
+            self.evaluator.push(board, move)
+            score = -self.negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            self.evaluator.pop(board)
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if quiet:
+                    self._remember_cutoff(board, move, depth, ply)
+                break
+
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, depth, _score_to_tt(best_score, ply), flag, best_move)
+        return best_score
+
+    def principal_variation(self, board: chess.Board, max_length: int) -> List[chess.Move]:
+        pv: List[chess.Move] = []
+        seen = set()
+        for _ in range(max_length):
+            key = self.position_key(board)
+            entry = self.tt.slots[key % self.tt.size]
+            if key in seen or entry is None or entry[0] != key or entry[4] is None:
+                break
+            if entry[4] not in board.legal_moves:
+                break
+            seen.add(key)
+            pv.append(entry[4])
+            board.push(entry[4])
+        for _ in pv:
+            board.pop()
+        return pv
+
+    def _begin(self, time_limit: Optional[float], node_limit: Optional[int]) -> float:
+        started = time.perf_counter()
+        self.nodes = 0
+        self.qnodes = 0
+        self.tt.new_search()
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        # Keep move-ordering history from earlier searches, but let it fade.
+        self.history = [value >> 3 for value in self.history]
+        self._deadline = started + time_limit if time_limit is not None else None
+        self._node_limit = node_limit
+        return started
+
+    def _finish(self, result: SearchResult, started: float) -> SearchResult:
+        result.nodes = self.nodes
+        result.qnodes = self.qnodes
+        result.tt_hit_rate = self.tt.hit_rate()
+        result.elapsed = time.perf_counter() - started
+        self._deadline = None
+        self._node_limit = None
+        return result
+
+    def search(self, board: chess.Board, max_depth: int = 64, time_limit: Optional[float] = None,
+               node_limit: Optional[int] = None) -> SearchResult:
+        started = self._begin(time_limit, node_limit)
+
+        result = SearchResult(best_move=None, score=0, depth=0)
+        legal_moves = list(board.legal_moves)
+        if not legal_moves:
+            result.score = -MATE_SCORE if board.is_checkmate() else 0
+            return self._finish(result, started)
+        # Always have something to play, even if the first iteration is cut short.
+        result.best_move = legal_moves[0]
+
+        root_board = board.copy(stack=False)
+        self.evaluator.reset(root_board)
+        for depth in range(1, max_depth + 1):
+            try:
+                score = self.negamax(root_board, depth, -INFINITY, INFINITY, 0)
+            except SearchAborted:
+                break
+            # A mate found through the TT can lie deeper than this iteration.
+            pv_length = depth if abs(score) <= MATE_BOUND else max(depth, MATE_SCORE - abs(score))
+            pv = self.principal_variation(root_board, pv_length)
+            result.depth = depth
+            result.score = score
+            result.pv = pv
+            if pv:
+                result.best_move = pv[0]
+            if abs(score) > MATE_BOUND:
+                break
+
+        return self._finish(result, started)
+
+    def search_move(self, board: chess.Board, move: chess.Move, depth: int, alpha: int) -> SearchResult:
+        # Scores a single root move to the given total depth. The score is
+        # exact when it is at least alpha; anything lower is an upper bound.
+        # Shallower iterations run first only to seed the TT and move ordering.
+        started = self._begin(None, None)
+        child = board.copy(stack=False)
+        self.evaluator.reset(child)
+        self.evaluator.push(child, move)
+        for warmup in range(1, depth - 1):
+            self.negamax(child, warmup, -INFINITY, 1 - alpha, 1)
+        score = -self.negamax(child, depth - 1, -INFINITY, 1 - alpha, 1)
+        pv = [move] + self.principal_variation(child, depth - 1)
+        return self._finish(SearchResult(best_move=move, score=score, depth=depth, pv=pv), started)
+
+def search(board: chess.Board, max_depth: int = 64, time_limit: Optional[float] = None,
+           node_limit: Optional[int] = None, searcher: Optional[Searcher] = None) -> SearchResult:
+    searcher = searcher or Searcher()
+    return searcher.search(board, max_depth=max_depth, time_limit=time_limit, node_limit=node_limit)
@@ -0,0 +1,53 @@
+import os
+import sys
+
+import chess
+
+# A minimal UCI engine for the pool tests. FAKE_UCI_CRASH makes it exit on
+# "go": "always" on every search, or a file path to crash only while that
+# file does not exist yet (the crashing process creates it).
+
+
+def should_crash() -> bool:
+    mode = os.environ.get("FAKE_UCI_CRASH", "")
+    if mode == "always":
+        return True
+    if mode and not os.path.exists(mode):
+        open(mode, "w").close()
+        return True
+    return False
+
+
+def main() -> None:
+    board = chess.Board()
+    for line in sys.stdin:
+        command, _, args = line.strip().partition(" ")
+        if command == "uci":
+            print("id name FakeUCI")
+            print("option name Threads type spin default 1 min 1 max 8")
+            print("option name Hash type spin default 16 min 1 max 1024")
+            print("uciok")
+        elif command == "isready":
+            print("readyok")
+        elif command == "position":
+            tokens = args.split()
+            if tokens[0] == "startpos":
+                board = chess.Board()
+                rest = tokens[1:]
+            else:
+                board = chess.Board(" ".join(tokens[1:7]))
+                rest = tokens[7:]
+            for uci in rest[1:]:
+                board.push_uci(uci)
+        elif command == "go":
+            if should_crash():
+                sys.exit(1)
+            move = next(iter(board.legal_moves), None)
+            print(f"bestmove {move.uci() if move else '(none)'}")
+        elif command == "quit":
+            break
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+os.environ.setdefault("SEARCH_WORKERS", "1")
+os.environ.setdefault("STOCKFISH_PATH", os.devnull)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import app  # noqa: E402
+
+# Out of the opening book, so every minimax answer comes from a search.
+FEN = "r1bq1rk1/ppp2ppp/2np1n2/2b1p3/2B1P3/2NP1N2/PPP2PPP/R1BQ1RK1 w - - 0 7"
+QUEENS_GAMBIT = "r1bq1rk1/pp2bppp/2n1pn2/3p4/2PP4/2N1PN2/PP3PPP/R2QKB1R w KQ - 1 8"
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app.app) as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    app.result_cache.clear()
+
+
+def best_move(client, fen=FEN, **request):
+    response = client.post("/best-move/", json={"fen": fen, "game_mode": "minimax", **request})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_search_stopped_before_depth_one_is_not_cached(client, monkeypatch):
+    # A search cut off before depth 1 only has a placeholder move; it must
+    # not answer later requests as if it had run out of time.
+    def stopped_search(fen, depth, time_limit, node_limit=None):
+        return {"best_move": "c4f7", "score": 0, "depth": 0, "pv": []}
+
+    with ThreadPoolExecutor(1) as executor:
+        monkeypatch.setattr(app, "search_pool", executor)
+        monkeypatch.setattr(app.workers, "best_move", stopped_search)
+        assert best_move(client)["depth"] == 0
+    assert app.result_cache.stats()["entries"] == 0
+    monkeypatch.undo()
+    assert best_move(client)["depth"] > 0
+
+
+def test_node_limited_search_only_answers_its_own_depth(client):
+    # A position no worker has searched yet, so the node budget runs out.
+    shallow = best_move(client, QUEENS_GAMBIT, depth=3, node_limit=400)
+    assert 0 < shallow["depth"] < 3
+    assert best_move(client, QUEENS_GAMBIT, depth=3)["depth"] == 3
+    assert best_move(client, QUEENS_GAMBIT, depth=3)["depth"] == 3
+    assert app.result_cache.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize("limits", [{"depth": 0}, {"time_limit": 0}, {"node_limit": 0}, {"node_limit": -5}])
+def test_non_positive_limits_are_rejected(client, limits):
+    response = client.post("/best-move/", json={"fen": FEN, "game_mode": "minimax", **limits})
+    assert response.status_code == 400
@@ -0,0 +1,47 @@
+import sqlite3
+
+import chess
+
+from cache import ResultCache
+
+
+def test_persisted_results_survive_a_restart(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    cache = ResultCache(db_path=db_path, version="v1")
+    cache.put(chess.Board(), "minimax", {"best_move": "e2e4"}, depth=4)
+    cache.close()
+
+    cache = ResultCache(db_path=db_path, version="v1")
+    assert cache.get(chess.Board(), "minimax", depth=4) == {"best_move": "e2e4"}
+    assert cache.get(chess.Board(), "minimax", depth=5) is None
+    cache.close()
+
+
+def test_results_from_another_version_are_ignored_and_replaced(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    cache = ResultCache(db_path=db_path, version="v1")
+    cache.put(chess.Board(), "minimax", {"best_move": "e2e4"}, depth=6)
+    cache.close()
+
+    cache = ResultCache(db_path=db_path, version="v2")
+    assert cache.get(chess.Board(), "minimax") is None
+    cache.put(chess.Board(), "minimax", {"best_move": "d2d4"}, depth=3)
+    cache.close()
+
+    cache = ResultCache(db_path=db_path, version="v2")
+    assert cache.get(chess.Board(), "minimax", depth=3) == {"best_move": "d2d4"}
+    cache.close()
+
+
+def test_unversioned_database_is_discarded(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    db = sqlite3.connect(db_path)
+    db.execute("CREATE TABLE results (position TEXT NOT NULL, mode TEXT NOT NULL, depth INTEGER NOT NULL, "
+               "time_limit REAL, value TEXT NOT NULL, PRIMARY KEY (position, mode))")
+    db.execute("INSERT INTO results VALUES (?, 'minimax', 9, NULL, '{}')", (chess.Board().epd(),))
+    db.commit()
+    db.close()
+
+    cache = ResultCache(db_path=db_path, version="v1")
+    assert cache.get(chess.Board(), "minimax") is None
+    cache.close()
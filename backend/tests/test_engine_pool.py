@@ -0,0 +1,108 @@
+import os
+import sys
+
+import chess
+import chess.engine
+import pytest
+
+from engine_pool import EnginePool, EnginePoolBusy
+
+FAKE_UCI = os.path.join(os.path.dirname(__file__), "fake_uci.py")
+
+
+@pytest.fixture
+def engine_path(tmp_path):
+    # popen_uci takes a single executable, so wrap the script in one.
+    path = tmp_path / "fake-engine"
+    path.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_UCI}" "$@"\n')
+    path.chmod(0o755)
+    return str(path)
+
+
+@pytest.fixture
+def make_pool(engine_path):
+    pools = []
+
+    def make(**kwargs):
+        pool = EnginePool(engine_path=engine_path, **kwargs)
+        pool.start()
+        pools.append(pool)
+        return pool
+
+    yield make
+    for pool in pools:
+        pool.close()
+
+
+LIMIT = chess.engine.Limit(time=0.01)
+
+
+def test_checkout_lends_distinct_engines_and_returns_them(make_pool):
+    pool = make_pool(size=2)
+    with pool.engine() as first, pool.engine() as second:
+        assert first is not second
+        assert pool.stats()["idle"] == 0
+    assert pool.stats() == {"size": 2, "idle": 2, "alive": 2, "restarts": 0}
+    assert pool.play(chess.Board(), LIMIT) in chess.Board().legal_moves
+
+
+def test_crash_during_search_is_retried_on_a_restarted_engine(make_pool, monkeypatch, tmp_path):
+    monkeypatch.setenv("FAKE_UCI_CRASH", str(tmp_path / "crashed"))
+    pool = make_pool(size=1)
+    assert pool.play(chess.Board(), LIMIT) in chess.Board().legal_moves
+    assert pool.stats() == {"size": 1, "idle": 1, "alive": 1, "restarts": 1}
+
+
+def test_repeated_crash_is_reported_as_busy(make_pool, monkeypatch):
+    monkeypatch.setenv("FAKE_UCI_CRASH", "always")
+    pool = make_pool(size=1)
+    with pytest.raises(EnginePoolBusy):
+        pool.play(chess.Board(), LIMIT)
+    assert pool.stats()["alive"] == 1
+
+
+def test_failed_restart_after_a_crash_is_reported_as_busy(make_pool, monkeypatch, tmp_path):
+    monkeypatch.setenv("FAKE_UCI_CRASH", str(tmp_path / "crashed"))
+    pool = make_pool(size=1)
+    engine_path = pool.engine_path
+    pool.engine_path = str(tmp_path / "missing-engine")
+    with pytest.raises(EnginePoolBusy, match="could not be restarted"):
+        pool.play(chess.Board(), LIMIT)
+    pool.engine_path = engine_path
+    assert pool.play(chess.Board(), LIMIT) in chess.Board().legal_moves
+    assert pool.stats()["alive"] == 1
+
+
+def test_dead_idle_engine_is_restarted_on_checkout(make_pool):
+    pool = make_pool(size=1)
+    with pool.engine() as engine:
+        pass
+    engine.close()
+    with pool.engine() as replacement:
+        assert replacement is not engine
+    assert pool.stats()["restarts"] == 1
+
+
+def test_rejects_callers_beyond_the_queue(make_pool):
+    pool = make_pool(size=1, max_queue=0)
+    with pool.engine():
+        with pytest.raises(EnginePoolBusy, match="too many pending"):
+            with pool.engine():
+                pass
+    with pool.engine():
+        pass
+
+
+def test_waiting_caller_times_out(make_pool):
+    pool = make_pool(size=1, max_queue=1, acquire_timeout=0.05)
+    with pool.engine():
+        with pytest.raises(EnginePoolBusy, match="timed out"):
+            with pool.engine():
+                pass
+
+
+def test_closed_pool_rejects_callers(make_pool):
+    pool = make_pool(size=1)
+    pool.close()
+    with pytest.raises(EnginePoolBusy):
+        pool.play(chess.Board(), LIMIT)
@@ -0,0 +1,38 @@
+import random
+
+import chess
+
+from evaluation import IncrementalEvaluator, evaluate, evaluate_batch
+
+
+def random_positions(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    boards = []
+    for _ in range(count):
+        board = chess.Board()
+        for _ in range(rng.randint(0, 80)):
+            moves = list(board.legal_moves)
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+        boards.append(board)
+    return boards
+
+
+def test_mirrored_positions_have_negated_scores():
+    boards = random_positions(200)
+    mirrored = [board.mirror() for board in boards]
+    assert all(evaluate(board) == -evaluate(mirror) for board, mirror in zip(boards, mirrored))
+    assert (evaluate_batch(boards) == -evaluate_batch(mirrored)).all()
+
+
+def test_all_paths_agree():
+    boards = random_positions(200, seed=2)
+    batch = evaluate_batch(boards)
+    evaluator = IncrementalEvaluator()
+    for board, batch_score in zip(boards, batch):
+        replay = chess.Board()
+        evaluator.reset(replay)
+        for move in board.move_stack:
+            evaluator.push(replay, move)
+        assert evaluator.score() == evaluate(board) == batch_score
@@ -0,0 +1,96 @@
+import json
+
+import chess
+
+from multiplayer import Room, RoomHub
+
+
+class FakeConnection:
+    def __init__(self):
+        self.color = None
+        self.sent = []
+
+    def send(self, text: str) -> bool:
+        self.sent.append(json.loads(text))
+        return True
+
+    def send_json(self, message: dict) -> bool:
+        return self.send(json.dumps(message))
+
+
+def seated_room(count: int):
+    room = Room("test", RoomHub())
+    connections = [FakeConnection() for _ in range(count)]
+    for connection in connections:
+        room.join(connection)
+    return room, connections
+
+
+def test_seats_go_to_the_first_two_connections():
+    room, (white, black, spectator) = seated_room(3)
+    assert (white.color, black.color, spectator.color) == (chess.WHITE, chess.BLACK, None)
+    room.leave(white)
+    newcomer = FakeConnection()
+    room.join(newcomer)
+    assert newcomer.color == chess.WHITE
+
+
+def test_only_the_side_to_move_may_play():
+    room, (white, black, spectator) = seated_room(3)
+    room.handle(black, {"from": "e7", "to": "e5"})
+    assert black.sent[-1]["error"] == "not your turn"
+    room.handle(spectator, {"from": "e2", "to": "e4"})
+    assert spectator.sent[-1]["error"] == "spectators cannot move"
+    assert not room.board.move_stack
+
+    room.handle(white, {"from": "e2", "to": "e4"})
+    assert black.sent[-1]["san"] == "e4"
+    room.handle(white, {"from": "d2", "to": "d4"})
+    assert white.sent[-1]["error"] == "not your turn"
+    assert white.sent[-1]["fen"] == room.board.fen()
+
+
+def play(room, white, black, *moves):
+    for index, uci in enumerate(moves):
+        room.handle(white if index % 2 == 0 else black, {"from": uci[:2], "to": uci[2:4]})
+
+
+def test_only_the_last_mover_may_undo():
+    room, (white, black, spectator) = seated_room(3)
+    play(room, white, black, "e2e4", "e7e5")
+    room.handle(white, {"type": "undo"})
+    assert white.sent[-1]["error"] == "only the player who made the last move can undo it"
+    room.handle(black, {"type": "undo"})
+    assert all(connection.sent[-1]["moves"] == ["e4"] for connection in (white, black, spectator))
+
+
+def test_reset_needs_both_players_while_the_game_is_on():
+    room, (white, black, spectator) = seated_room(3)
+    play(room, white, black, "e2e4")
+    room.handle(black, {"type": "reset"})
+    assert white.sent[-1] == {"type": "reset_offer", "from": "black"}
+    assert room.history == ["e4"]
+    room.handle(spectator, {"type": "reset"})
+    assert spectator.sent[-1]["type"] == "error"
+    room.handle(white, {"type": "reset"})
+    assert all(connection.sent[-1]["fen"] == chess.STARTING_FEN for connection in (white, black, spectator))
+
+
+def test_either_player_may_reset_a_finished_game():
+    room, (white, black) = seated_room(2)
+    play(room, white, black, "f2f3", "e7e5", "g2g4", "d8h4")
+    assert room.board.is_checkmate()
+    room.handle(white, {"type": "reset"})
+    assert room.board.fen() == chess.STARTING_FEN
+
+
+def test_a_player_alone_in_the_room_plays_both_sides():
+    room, (white,) = seated_room(1)
+    assert white.sent == [] and room.alone(white)
+    play(room, white, white, "e2e4", "e7e5")
+    room.handle(white, {"type": "undo"})
+    room.handle(white, {"type": "undo"})
+    assert not room.board.move_stack
+    play(room, white, white, "d2d4")
+    room.handle(white, {"type": "reset"})
+    assert room.board.fen() == chess.STARTING_FEN
@@ -0,0 +1,42 @@
+import chess
+
+from opening_book import OpeningBook, book_is_stale, ensure_book, source_paths
+
+
+def test_shipped_book_matches_its_sources():
+    assert not book_is_stale()
+
+
+def test_ensure_book_rebuilds_only_when_sources_change(tmp_path):
+    source = tmp_path / "ecoA.json"
+    source.write_text(source_paths()[0].read_text())
+    book_path = tmp_path / "book.bin"
+
+    assert ensure_book([source], book_path)
+    assert not ensure_book([source], book_path)
+    source.write_text('{"A00": {"moves": "1. e4 e5"}}')
+    assert book_is_stale([source], book_path)
+    assert ensure_book([source], book_path)
+
+    book = OpeningBook(book_path)
+    assert [entry.move for entry in book.moves(chess.Board())] == [chess.Move.from_uci("e2e4")]
+    book.close()
+
+
+def test_missing_book_has_no_moves(tmp_path):
+    book = OpeningBook(tmp_path / "book.bin")
+    assert book.moves(chess.Board()) == []
+    assert not list(tmp_path.iterdir())
+
+
+def test_move_numbers_glued_to_the_san_are_stripped(tmp_path):
+    source = tmp_path / "ecoA.json"
+    source.write_text('{"A00": {"moves": "1.a3 g6 2.g4"}}')
+    book_path = tmp_path / "book.bin"
+    ensure_book([source], book_path)
+    book = OpeningBook(book_path)
+    board = chess.Board()
+    board.push_san("a3")
+    board.push_san("g6")
+    assert [entry.move for entry in book.moves(board)] == [chess.Move.from_uci("g2g4")]
+    book.close()
@@ -0,0 +1,33 @@
+import chess
+import pytest
+
+from parallel_search import ParallelSearch, ParallelSearchBusy
+from search import Searcher
+
+FEN = "r1bq1rk1/ppp2ppp/2np1n2/2b1p3/2B1P3/2NP1N2/PPP2PPP/R1BQ1RK1 w - - 0 7"
+
+
+@pytest.fixture(scope="module")
+def parallel():
+    search = ParallelSearch.create(2, slots=1)
+    search.acquire_timeout = 0.05
+    yield search
+    search.shutdown()
+
+
+def test_matches_the_serial_deterministic_search(parallel):
+    board = chess.Board(FEN)
+    serial = Searcher(deterministic=True).search(board, max_depth=3)
+    result = parallel.search(board, 3)
+    assert result.score == serial.score
+    assert result.best_move in board.legal_moves
+    assert parallel.search(board, 3).best_move == result.best_move
+
+
+def test_busy_when_every_slot_is_taken(parallel):
+    slot = parallel._free_slots.get()
+    try:
+        with pytest.raises(ParallelSearchBusy):
+            parallel.search(chess.Board(FEN), 2)
+    finally:
+        parallel._free_slots.put(slot)
@@ -0,0 +1,160 @@
+import chess
+import pytest
+
+from bench import BENCH_SUITE
+from evaluation import evaluate
+from search import INFINITY, MATE_SCORE, Searcher, _score_from_tt, _score_to_tt
+
+BACK_RANK_MATE = "6k1/5ppp/8/8/8/8/5PPP/R5K1 w - - 0 1"
+ROOK_LADDER = "7k/8/8/8/8/8/R7/1R4K1 w - - 0 1"
+
+
+def reference_quiescence(board: chess.Board, alpha: int, beta: int, ply: int, qdepth: int) -> int:
+    # The same quiescence rules as Searcher without ordering, TT or pruning.
+    if qdepth == 0 and board.is_check():
+        moves = list(board.legal_moves)
+        if not moves:
+            return -MATE_SCORE + ply
+        best = -INFINITY
+    else:
+        best = evaluate(board) if board.turn == chess.WHITE else -evaluate(board)
+        if best >= beta:
+            return best
+        alpha = max(alpha, best)
+        moves = [move for move in board.legal_moves if board.is_capture(move) or move.promotion]
+    for move in moves:
+        board.push(move)
+        score = -reference_quiescence(board, -beta, -alpha, ply + 1, qdepth + 1)
+        board.pop()
+        best = max(best, score)
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            break
+    return best
+
+
+def reference(board: chess.Board, depth: int, alpha: int = -INFINITY, beta: int = INFINITY, ply: int = 0) -> int:
+    # Plain fail-soft alpha-beta in generation order.
+    if depth <= 0:
+        return reference_quiescence(board, alpha, beta, ply, 0)
+    if board.is_insufficient_material():
+        return 0
+    moves = list(board.legal_moves)
+    if not moves:
+        return -MATE_SCORE + ply if board.is_check() else 0
+    best = -INFINITY
+    for move in moves:
+        board.push(move)
+        score = -reference(board, depth - 1, -beta, -alpha, ply + 1)
+        board.pop()
+        best = max(best, score)
+        alpha = max(alpha, score)
+        if alpha >= beta:
+            break
+    return best
+
+
+def play_out(board: chess.Board, pv) -> chess.Board:
+    board = board.copy()
+    for move in pv:
+        board.push(move)
+    return board
+
+
+def test_finds_mate_in_one():
+    board = chess.Board(BACK_RANK_MATE)
+    result = Searcher().search(board, max_depth=4)
+    assert result.best_move == chess.Move.from_uci("a1a8")
+    assert result.score == MATE_SCORE - 1
+    assert result.depth == 1
+
+
+def test_finds_mate_in_two_and_keeps_the_distance_through_the_tt():
+    board = chess.Board(ROOK_LADDER)
+    searcher = Searcher()
+    for _ in range(2):
+        result = searcher.search(board, max_depth=5)
+        assert result.score == MATE_SCORE - 3
+        assert play_out(board, result.pv).is_checkmate()
+
+
+def test_mate_scores_are_stored_relative_to_the_node():
+    for score in (MATE_SCORE - 5, -MATE_SCORE + 7, 150, -150):
+        assert _score_from_tt(_score_to_tt(score, 4), 4) == score
+    # A mate found 5 plies below the root is 3 plies below a node at ply 2,
+    # and 1 ply further away when that node is reached at ply 3.
+    assert _score_from_tt(_score_to_tt(MATE_SCORE - 5, 2), 3) == MATE_SCORE - 6
+
+
+def test_node_limit_is_respected():
+    board = chess.Board(BENCH_SUITE["middlegame"][0])
+    result = Searcher().search(board, max_depth=20, node_limit=3000)
+    assert result.nodes <= 3000
+    assert result.depth < 20
+    assert result.best_move in board.legal_moves
+
+
+def test_time_limit_is_respected():
+    board = chess.Board(BENCH_SUITE["middlegame"][0])
+    result = Searcher().search(board, max_depth=20, time_limit=0.2)
+    assert result.elapsed < 0.5
+    assert result.depth < 20
+    assert result.best_move in board.legal_moves
+
+
+@pytest.mark.parametrize("fen, depth", [
+    (BENCH_SUITE["opening"][1], 3),
+    (BENCH_SUITE["opening"][2], 2),
+    (BENCH_SUITE["middlegame"][2], 2),
+    (BENCH_SUITE["endgame"][0], 3),
+    (BENCH_SUITE["endgame"][1], 3),
+    (BENCH_SUITE["endgame"][2], 3),
+])
+def test_fixed_depth_score_matches_plain_alpha_beta(fen, depth):
+    board = chess.Board(fen)
+    result = Searcher(deterministic=True).search(board, max_depth=depth)
+    assert result.depth == depth
+    assert result.score == reference(board, depth)
+
+
+def test_second_search_reuses_the_tt():
+    board = chess.Board(BENCH_SUITE["middlegame"][2])
+    searcher = Searcher()
+    first = searcher.search(board, max_depth=3)
+    second = searcher.search(board, max_depth=3)
+    assert second.tt_hit_rate > 0
+    assert second.nodes < first.nodes
+    assert second.score == first.score
+
+
+def test_quiescence_scores_a_checkmate_without_searching_on():
+    board = chess.Board("rnb1kbnr/pppp1ppp/8/4p3/6Pq/5P2/PPPPP2P/RNBQKBNR w KQkq - 1 3")
+    searcher = Searcher()
+    searcher.evaluator.reset(board)
+    assert searcher.quiescence(board, -INFINITY, INFINITY, 2) == -MATE_SCORE + 2
+
+
+def test_quiescence_sees_the_recapture_at_the_horizon():
+    # Qxe5 wins a pawn at depth 1 unless the pawn recapture on d6 is seen.
+    board = chess.Board("4k3/8/3p4/4p3/8/8/8/4QK2 w - - 0 1")
+    result = Searcher().search(board, max_depth=1)
+    assert result.best_move != chess.Move.from_uci("e1e5")
+    assert result.score == reference(board, 1)
+
+
+def test_capture_moves_include_quiet_promotions():
+    board = chess.Board("4k3/P7/8/8/8/8/8/4K3 w - - 0 1")
+    assert chess.Move.from_uci("a7a8q") in Searcher().capture_moves(board)
+
+
+def test_move_ordering():
+    board = chess.Board("4k3/8/8/2q1p3/3P4/8/8/3QK3 w - - 0 1")
+    searcher = Searcher()
+    tt_move = chess.Move.from_uci("e1e2")
+    killer = chess.Move.from_uci("d1d3")
+    favourite = chess.Move.from_uci("d1h5")
+    searcher.killers[0] = [killer, None]
+    searcher.history[64 * 64 + favourite.from_square * 64 + favourite.to_square] = 100
+    moves = searcher.ordered_moves(board, tt_move, 0)
+    # TT move, then captures by victim value, then killers, then history.
+    assert moves[:5] == [tt_move, chess.Move.from_uci("d4c5"), chess.Move.from_uci("d4e5"), killer, favourite]
@@ -0,0 +1,77 @@
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import chess
+import chess.pgn
+
+import profiling
+from AIEngine import get_opening_move
+from search import Searcher
+
+# Each worker process keeps one searcher, so its transposition table carries
+# over between the positions that process is handed.
+_searcher: Optional[Searcher] = None
+
+
+def _get_searcher() -> Searcher:
+    global _searcher
+    if _searcher is None:
+        _searcher = Searcher()
+        if profiling.phases_enabled():
+            profiling.instrument_searcher(_searcher)
+    return _searcher
+
+
+def _search(board: chess.Board, depth: int, time_limit: Optional[float], node_limit: Optional[int]) -> dict:
+    searcher = _get_searcher()
+    timings = getattr(searcher, "phase_timings", None)
+    if timings is not None:
+        timings.reset()
+    with profiling.cprofile_section("search"):
+        result = searcher.search(board, max_depth=depth, time_limit=time_limit, node_limit=node_limit)
+    data = result.to_dict()
+    if timings is not None:
+        data["phases"] = timings.report(result.elapsed)
+    return data
+
+
+def create_pool(workers: Optional[int] = None, initializer=None, initargs: tuple = ()) -> ProcessPoolExecutor:
+    workers = workers or int(os.environ.get("SEARCH_WORKERS", "0")) or os.cpu_count() or 1
+    # Spawn rather than fork: the parent runs engine-pool and event-loop
+    # threads that must not be duplicated into the children.
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                               initializer=initializer, initargs=initargs)
+
+
+def best_move(fen: str, depth: int, time_limit: Optional[float], node_limit: Optional[int] = None) -> dict:
+    board = chess.Board(fen)
+    move = get_opening_move(board)
+    if move:
+        return {"best_move": move.uci()}
+    return _search(board, depth, time_limit, node_limit)
+
+
+def analyse_position(index: int, fen: str, depth: int, time_limit: Optional[float],
+                     node_limit: Optional[int] = None) -> dict:
+    try:
+        board = chess.Board(fen)
+    except ValueError as exc:
+        return {"index": index, "fen": fen, "error": str(exc)}
+    return {"index": index, "fen": fen, **_search(board, depth, time_limit, node_limit)}
+
+
+def pgn_positions(pgn: str) -> List[str]:
+    game = chess.pgn.read_game(io.StringIO(pgn))
+    if game is None:
+        raise ValueError("no game found in PGN")
+    if game.errors:
+        raise ValueError(str(game.errors[0]))
+    board = game.board()
+    fens = [board.fen()]
+    for move in game.mainline_moves():
+        board.push(move)
+        fens.append(board.fen())
+    return fens
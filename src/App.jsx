@@ -13,19 +13,42 @@ export default function App() {
   const [selectedPieceTheme, setSelectedPieceTheme] = useState("Classic");
   const [selectedBoardTheme, setSelectedBoardTheme] = useState("Sand");
   const [useDefaultPieces, setUseDefaultPieces] = useState(false); // New state for dropdown
+  const [playerColor, setPlayerColor] = useState(null); // "white", "black" or null for spectators
+  const [players, setPlayers] = useState({ white: false, black: false }); // which seats are taken
+  const [notice, setNotice] = useState("");
   const wsRef = useRef(null); // reference to WebSocket
   useEffect(() => {
-  const ws = new WebSocket("ws://localhost:8000/ws/chess");
+  // Open the app with ?room=<name> to play in a room of your own.
+  const room = new URLSearchParams(window.location.search).get("room") || "lobby";
+  const ws = new WebSocket(`ws://localhost:8000/ws/chess/${encodeURIComponent(room)}`);
   wsRef.current = ws;
 
   ws.onopen = () => console.log("Connected to WebSocket server");
 
   ws.onmessage = (event) => {
-    const moveData = JSON.parse(event.data);
-    const move = gameRef.current.move({ from: moveData.from, to: moveData.to, promotion: "q" });
-    if (move) {
-      setFen(gameRef.current.fen());
-      setMoveHistory(prev => [...prev, move.san]);
+    const data = JSON.parse(event.data);
+    if (data.type === "move") {
+      gameRef.current.load(data.fen);
+      setFen(data.fen);
+      setMoveHistory(prev => [...prev, data.san]);
+      setNotice("");
+      return;
+    }
+    if (data.type === "reset_offer") {
+      setNotice(`${data.from} offers a new game: press Reset Game to accept.`);
+      return;
+    }
+    // "state" and "error" carry the room's authoritative position.
+    if (data.type === "error") setNotice(data.error);
+    if (data.type === "state") {
+      setPlayerColor(data.color);
+      setPlayers(data.players);
+      setNotice("");
+    }
+    if (data.fen) {
+      gameRef.current.load(data.fen);
+      setFen(data.fen);
+      setMoveHistory(data.moves || []);
     }
   };
 
@@ -34,26 +57,48 @@ export default function App() {
   return () => ws.close();
 }, []);
 
+  function connected() {
+    return wsRef.current && wsRef.current.readyState === WebSocket.OPEN;
+  }
+
+  // A player alone in the room moves for both sides, as in a local game.
+  const alone = playerColor && !players[playerColor === "white" ? "black" : "white"];
 
   function onDrop(sourceSquare, targetSquare) {
-    const move = gameRef.current.move({ from: sourceSquare, to: targetSquare, promotion: "q" });
+    // Online, only the seat whose turn it is may move.
+    if (connected() && !alone && (!playerColor || gameRef.current.turn() !== playerColor[0])) return false;
+    let move;
+    try {
+      move = gameRef.current.move({ from: sourceSquare, to: targetSquare, promotion: "q" });
+    } catch {
+      return false;
+    }
     if (!move) return false;
     setFen(gameRef.current.fen());
     setMoveHistory(prev => [...prev, move.san]);
     // Broadcast move to others
-    if (wsRef.current && wsRef.current.readyState === WebSocket.OPEN) {
+    if (connected()) {
       wsRef.current.send(JSON.stringify({ from: sourceSquare, to: targetSquare }));
     }
     return true;
   }
 
+  // Online, reset and undo go through the server, which sends everyone the new state.
   function resetGame() {
+    if (connected()) {
+      wsRef.current.send(JSON.stringify({ type: "reset" }));
+      return;
+    }
     gameRef.current.reset();
     setFen(gameRef.current.fen());
     setMoveHistory([]);
   }
 
   function undoMove() {
+    if (connected()) {
+      wsRef.current.send(JSON.stringify({ type: "undo" }));
+      return;
+    }
     gameRef.current.undo();
     setFen(gameRef.current.fen());
     setMoveHistory(prev => prev.slice(0, -1));
@@ -123,6 +168,7 @@ export default function App() {
           id="ChessBoard"
           boardWidth={600}
           position={fen}
+          boardOrientation={playerColor === "black" ? "black" : "white"}
           onPieceDrop={onDrop}
           customPieces={customPieces}
           customDarkSquareStyle={{ backgroundColor: boardThemes[selectedBoardTheme]?.dark }}
@@ -134,6 +180,7 @@ export default function App() {
           <div style={{ border: "1px solid #ccc", padding: "10px", height: "500px", overflowY: "scroll", width: "200px" }}>
             {moveHistory.length ? <ol>{moveHistory.map((m, i) => <li key={i}>{m}</li>)}</ol> : <p>No moves yet.</p>}
           </div>
+          {notice && <p>{notice}</p>}
           <div style={{ marginTop: "10px", display: "flex", flexDirection: "column", gap: "10px" }}>
             <button onClick={resetGame}>Reset Game</button>
             <button onClick={undoMove} disabled={!moveHistory.length}>Undo Move</button>